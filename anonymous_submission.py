@@ -1,31 +1,91 @@
 import hashlib
-import json
+import itertools
+import orjson
 import time
 import threading
 import base64
 import random
+import os
+import secrets
+import functools
+import queue
+import zstandard as zstd
+import cbor2
+import msgspec
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 from typing import Dict, List, Any, Optional
-import requests
+import asyncio
+import aiohttp
 import socks
 import socket
 from urllib.parse import urlparse
 
+def _count_value(counter) -> int:
+    """Read an itertools.count without consuming a value"""
+    return counter.__reduce__()[1][0]
+
+
+class Submission(msgspec.Struct):
+    """A single collected item queued for anonymous submission"""
+    type: str
+    content: str
+    source: str
+    timestamp: float
+    context: str = ""
+
+
+# Struct fields serialize in declaration order, so batches get a
+# deterministic byte layout without per-call key sorting; plain dicts
+# are still ordered deterministically by the encoder
+_json_encoder = msgspec.json.Encoder(order="deterministic")
+
+
 class OnionRouter:
     def __init__(self, api_url: str = "http://localhost:5000"):
         """Initialize onion router for anonymous submissions"""
         self.api_url = api_url
         self.onion_routers = self._get_onion_routers()
-        self.session_keys = {}  # session_id -> list of encryption keys
+        # Routes are deterministically derivable from the session ID, so a
+        # bounded LRU replaces the old unbounded session_keys dict (which
+        # leaked for any session that never called cleanup_session)
+        self._route_for = functools.lru_cache(maxsize=1024)(self._derive_route)
+        # Each stat advances an itertools.count: its __next__ is one C
+        # call the GIL never splits, where dict[key] += 1 is a
+        # read-modify-write that loses updates across threads
         self.routing_stats = {
-            'total_routed': 0,
-            'successful_submissions': 0,
-            'failed_submissions': 0
+            'total_routed': itertools.count(),
+            'successful_submissions': itertools.count(),
+            'failed_submissions': itertools.count()
         }
-        self.lock = threading.Lock()
-        
+
+        # Batch JSON is highly repetitive, so compress before encrypting:
+        # less data to encrypt, encode and send
+        self._compressor = zstd.ZstdCompressor(level=3)
+
+        # Lazily created aiohttp session; keep-alive connection pooling
+        # amortizes the TCP (and TLS) handshake across submissions
+        self._http_session = None
+        self._http_loop = None
+
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """Get (or create) the pooled HTTP session bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        if (self._http_session is None or self._http_session.closed or
+                self._http_loop is not loop):
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16)
+            )
+            self._http_loop = loop
+        return self._http_session
+
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+
     def _get_onion_routers(self) -> List[Dict[str, Any]]:
         """Get list of available onion routers"""
         # In a real implementation, this would fetch from a distributed directory
@@ -38,190 +98,279 @@ class OnionRouter:
         
     def generate_session_id(self) -> str:
         """Generate anonymous session ID"""
-        return hashlib.sha256(str(time.time()).encode()).hexdigest()[:16]
+        return secrets.token_hex(8)
         
-    def create_onion_route(self, data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
-        """Create onion-routed submission"""
+    def _derive_route(self, session_id: str) -> tuple:
+        """Select an onion path and derive its hop ciphers for a session"""
         # Select random path through onion routers
         path_length = random.randint(3, 5)  # 3-5 hops
         selected_routers = random.sample(self.onion_routers, min(path_length, len(self.onion_routers)))
-        
-        # Generate encryption keys for each hop
-        encryption_keys = []
-        for router in selected_routers:
-            # In a real implementation, we would use the router's public key
-            # For simulation, we'll generate symmetric keys
-            key = hashlib.sha256(f"{session_id}_{router['id']}".encode()).digest()[:32]
-            encryption_keys.append(key)
-            
-        # Store keys for this session
-        self.session_keys[session_id] = encryption_keys
-        
-        # Encrypt data for each layer (onion encryption)
-        encrypted_data = self._layered_encrypt(data, encryption_keys)
-        
-        # Create onion packet
+
+        # In a real implementation, we would use the routers' public keys.
+        # For simulation, derive all hop keys from the session ID with a
+        # single XOF pass instead of one SHA-256 per hop, and build the
+        # cipher objects once so the AES key schedule is not re-derived
+        key_material = hashlib.shake_256(session_id.encode()).digest(32 * len(selected_routers))
+        ciphers = [
+            AESGCM(key_material[i * 32:(i + 1) * 32])
+            for i in range(len(selected_routers))
+        ]
+
+        return [router['id'] for router in selected_routers], ciphers
+
+    def create_onion_route(self, data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Create onion-routed submission"""
+        # Reuse the cached path and ciphers for repeat submissions in the
+        # same session; path selection and key derivation run once
+        path, ciphers = self._route_for(session_id)
+
+        # Serialize, compress and onion-encrypt in one fused pipeline
+        encrypted_data = self._seal(data, ciphers)
+
+        # Create onion packet; the payload stays binary because the packet
+        # travels as CBOR, avoiding base64's 33% inflation and encode pass
         onion_packet = {
             "session_id": session_id,
-            "path": [router['id'] for router in selected_routers],
-            "encrypted_payload": base64.b64encode(encrypted_data).decode(),
-            "timestamp": time.time()
+            "path": path,
+            "encrypted_payload": encrypted_data,
+            # Integer nanoseconds: one C call, no float formatting in the
+            # serializer
+            "timestamp": time.time_ns()
         }
-        
+
         return onion_packet
         
-    def _layered_encrypt(self, data: Dict[str, Any], keys: List[bytes]) -> bytes:
-        """Apply layered encryption (onion encryption)"""
-        # Convert data to JSON
-        data_json = json.dumps(data, sort_keys=True)
-        data_bytes = data_json.encode()
-        
+    def _seal(self, data: Any, ciphers: List[AESGCM]) -> bytes:
+        """Serialize, compress and apply layered (onion) encryption"""
+        # One pipeline, one live buffer: each stage's output replaces its
+        # input so intermediates are freed immediately instead of three
+        # full-size buffers being held across separate helper calls
+        buf = self._compressor.compress(_json_encoder.encode(data))
+
         # Encrypt from innermost to outermost layer
-        encrypted_data = data_bytes
-        for key in reversed(keys):
-            # In a real implementation, we would use proper encryption
-            # For simulation, we'll use simple XOR with key
-            encrypted_data = self._xor_encrypt(encrypted_data, key)
-            
-        return encrypted_data
-        
-    def _xor_encrypt(self, data: bytes, key: bytes) -> bytes:
-        """Simple XOR encryption for simulation"""
-        key_len = len(key)
-        return bytes([data[i] ^ key[i % key_len] for i in range(len(data))])
+        # AES-256-GCM dispatches to OpenSSL's AES-NI implementation, so each
+        # layer runs in hardware instead of a Python byte loop
+        for cipher in reversed(ciphers):
+            nonce = os.urandom(12)
+            buf = nonce + cipher.encrypt(nonce, buf, None)
+
+        return buf
         
-    def submit_anonymously(self, data: Dict[str, Any]) -> bool:
+    async def submit_anonymously(self, data: Dict[str, Any]) -> bool:
         """Submit data through onion routing"""
         session_id = self.generate_session_id()
-        
+
         try:
             # Create onion route
             onion_packet = self.create_onion_route(data, session_id)
-            
-            # Submit through API
-            response = requests.post(
+
+            # Submit through API over the pooled session as CBOR so the
+            # encrypted payload is sent as raw bytes
+            session = await self._get_http_session()
+            async with session.post(
                 f"{self.api_url}/api/volunteer/anonymous_submit",
-                json=onion_packet,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            with self.lock:
-                self.routing_stats['total_routed'] += 1
-                if response.status_code == 200:
-                    self.routing_stats['successful_submissions'] += 1
-                    print(f"Anonymous submission successful for session {session_id}")
-                    return True
-                else:
-                    self.routing_stats['failed_submissions'] += 1
-                    print(f"Anonymous submission failed: {response.status_code}")
-                    return False
-                    
+                data=cbor2.dumps(onion_packet),
+                headers={"Content-Type": "application/cbor"}
+            ) as response:
+                status = response.status
+
+            next(self.routing_stats['total_routed'])
+            if status == 200:
+                next(self.routing_stats['successful_submissions'])
+                print(f"Anonymous submission successful for session {session_id}")
+                return True
+            else:
+                next(self.routing_stats['failed_submissions'])
+                print(f"Anonymous submission failed: {status}")
+                return False
+
         except Exception as e:
-            with self.lock:
-                self.routing_stats['total_routed'] += 1
-                self.routing_stats['failed_submissions'] += 1
+            next(self.routing_stats['total_routed'])
+            next(self.routing_stats['failed_submissions'])
             print(f"Error in anonymous submission: {e}")
             return False
+
+    async def submit_batches(self, batches: List[Dict[str, Any]]) -> List[bool]:
+        """Submit several batches concurrently over one pooled session"""
+        return await asyncio.gather(
+            *[self.submit_anonymously(batch) for batch in batches]
+        )
             
     def get_routing_stats(self) -> Dict[str, Any]:
         """Get onion routing statistics"""
-        with self.lock:
-            total = self.routing_stats['total_routed']
-            success_rate = (
-                self.routing_stats['successful_submissions'] / total * 100
-                if total > 0 else 0
-            )
-            
-            return {
-                **self.routing_stats,
-                'success_rate': round(success_rate, 2)
-            }
+        snapshot = {name: _count_value(counter)
+                    for name, counter in self.routing_stats.items()}
+        total = snapshot['total_routed']
+        success_rate = (
+            snapshot['successful_submissions'] / total * 100
+            if total > 0 else 0
+        )
+
+        return {
+            **snapshot,
+            'success_rate': round(success_rate, 2)
+        }
             
     def cleanup_session(self, session_id: str):
         """Clean up session keys"""
-        with self.lock:
-            if session_id in self.session_keys:
-                del self.session_keys[session_id]
+        # Route material lives in a bounded LRU now, so stale sessions are
+        # evicted automatically; nothing to release per session
+        pass
 
 class BatchedSubmission:
-    def __init__(self, api_url: str = "http://localhost:5000", batch_size: int = 10):
+    def __init__(self, api_url: str = "http://localhost:5000", batch_size: int = 10,
+                 flush_interval: float = 300):
         """Initialize batched submission system"""
         self.api_url = api_url
         self.batch_size = batch_size
-        self.submission_queue = []
-        self.last_submission = 0
+        self.flush_interval = flush_interval
+        self.submission_queue = queue.Queue(maxsize=10_000)
         self.batch_stats = {
             'batches_submitted': 0,
             'items_submitted': 0,
             'failed_batches': 0
         }
-        self.lock = threading.Lock()
         self.onion_router = OnionRouter(api_url)
-        
-    def queue_submission(self, data: Dict[str, Any]):
+        self.is_running = True
+
+        # Single consumer thread owns all submission I/O; producers only
+        # ever touch the queue
+        self.consumer_thread = threading.Thread(target=self._run_consumer, daemon=True)
+        self.consumer_thread.start()
+
+    def queue_submission(self, data: Any):
         """Queue data for batched submission"""
-        with self.lock:
-            self.submission_queue.append(data)
-            
-            # Submit batch if queue is full or enough time has passed
-            if (len(self.submission_queue) >= self.batch_size or 
-                (time.time() - self.last_submission) > 300):  # 5 minutes
-                self._submit_batch()
-                
-    def _submit_batch(self):
-        """Submit batch of queued data"""
-        if not self.submission_queue:
-            return
-            
+        self.submission_queue.put(data)
+
+    def stop(self):
+        """Stop the consumer thread after draining in-flight work"""
+        self.is_running = False
+        # Shutdown sentinel: wakes the consumer out of its blocking get
+        # so it drains and exits instead of waiting out the flush window
+        try:
+            self.submission_queue.put_nowait(None)
+        except queue.Full:
+            pass  # Plenty queued; the consumer is awake already
+        if self.consumer_thread:
+            self.consumer_thread.join(timeout=10)
+
+    def _run_consumer(self):
+        """Host the consumer's event loop"""
+        asyncio.run(self._drain_loop())
+
+    def _next_batch(self) -> Optional[List[Any]]:
+        """Block for the next batch of queued items (runs off-loop)"""
+        try:
+            first = self.submission_queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return None
+        if first is None:  # Shutdown sentinel
+            return None
+
+        # Accumulate until the batch is full or the flush window closes;
+        # blocking gets with a shrinking timeout give size- and time-based
+        # flushing without any producer-side time.time() polling
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.submission_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:  # Sentinel mid-batch: submit what we have
+                break
+            batch.append(item)
+        return batch
+
+    async def _drain_loop(self):
+        """Drain queued items into batches and submit them"""
+        backoff = 1.0
+        # Keep going past stop() until the queue is drained, so items
+        # accepted before shutdown still get submitted
+        while self.is_running or not self.submission_queue.empty():
+            batch = await asyncio.to_thread(self._next_batch)
+            if not batch:
+                if not self.is_running:
+                    break
+                continue
+            if await self._submit_batch(batch):
+                backoff = 1.0
+            elif self.is_running:
+                # The failed batch went back on the queue the consumer
+                # drains next, so without a pause a down endpoint gets
+                # retried at connection-refused speed; back off
+                # exponentially until a batch goes through
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+            else:
+                # Shutting down with the endpoint failing: leave the
+                # requeued batch behind rather than retry forever
+                break
+        await self.onion_router.close()
+
+    async def _submit_batch(self, batch: List[Any]) -> bool:
+        """Submit a batch of drained data; True when it went through"""
         try:
             # Prepare batch
             batch_data = {
-                "submissions": self.submission_queue.copy(),
-                "batch_size": len(self.submission_queue),
-                "timestamp": time.time()
+                "submissions": batch,
+                "batch_size": len(batch),
+                "timestamp": time.time_ns()
             }
-            
+
             # Submit through onion routing for anonymity
-            success = self.onion_router.submit_anonymously(batch_data)
-            
-            with self.lock:
-                if success:
-                    self.batch_stats['batches_submitted'] += 1
-                    self.batch_stats['items_submitted'] += len(self.submission_queue)
-                    self.submission_queue.clear()
-                    self.last_submission = time.time()
-                else:
-                    self.batch_stats['failed_batches'] += 1
-                    
+            success = await self.onion_router.submit_anonymously(batch_data)
+
+            if success:
+                self.batch_stats['batches_submitted'] += 1
+                self.batch_stats['items_submitted'] += len(batch)
+                return True
+
+            self.batch_stats['failed_batches'] += 1
+            self._requeue(batch)
+            return False
+
         except Exception as e:
-            with self.lock:
-                self.batch_stats['failed_batches'] += 1
+            self.batch_stats['failed_batches'] += 1
+            self._requeue(batch)
             print(f"Error submitting batch: {e}")
+            return False
+
+    def _requeue(self, batch: List[Any]):
+        """Put a failed batch back on the queue"""
+        for item in batch:
+            try:
+                self.submission_queue.put_nowait(item)
+            except queue.Full:
+                break
             
     def get_batch_stats(self) -> Dict[str, Any]:
         """Get batch submission statistics"""
-        with self.lock:
-            total_batches = self.batch_stats['batches_submitted'] + self.batch_stats['failed_batches']
-            success_rate = (
-                self.batch_stats['batches_submitted'] / total_batches * 100
-                if total_batches > 0 else 0
-            )
-            
-            return {
-                **self.batch_stats,
-                'queue_size': len(self.submission_queue),
-                'success_rate': round(success_rate, 2)
-            }
+        total_batches = self.batch_stats['batches_submitted'] + self.batch_stats['failed_batches']
+        success_rate = (
+            self.batch_stats['batches_submitted'] / total_batches * 100
+            if total_batches > 0 else 0
+        )
+
+        return {
+            **self.batch_stats,
+            'queue_size': self.submission_queue.qsize(),
+            'success_rate': round(success_rate, 2)
+        }
 
 class SecureTransmission:
     def __init__(self):
         """Initialize secure transmission system"""
+        # encrypt_data is callable from arbitrary threads, so these
+        # advance itertools.count objects instead of bare ints
         self.encryption_stats = {
-            'data_encrypted': 0,
-            'encryption_errors': 0
+            'data_encrypted': itertools.count(),
+            'encryption_errors': itertools.count()
         }
-        self.lock = threading.Lock()
-        
+
     def encrypt_data(self, data: Dict[str, Any], public_key_pem: str) -> Dict[str, Any]:
         """Encrypt data with public key"""
         try:
@@ -232,10 +381,9 @@ class SecureTransmission:
                 backend=default_backend()
             )
             
-            # Convert data to JSON
-            data_json = json.dumps(data, sort_keys=True)
-            data_bytes = data_json.encode()
-            
+            # Convert data to JSON (orjson serializes straight to bytes)
+            data_bytes = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
             # Encrypt data
             encrypted_data = public_key.encrypt(
                 data_bytes,
@@ -249,34 +397,33 @@ class SecureTransmission:
             # Encode as base64 for transmission
             encrypted_b64 = base64.b64encode(encrypted_data).decode()
             
-            with self.lock:
-                self.encryption_stats['data_encrypted'] += 1
-                
+            next(self.encryption_stats['data_encrypted'])
+
             return {
                 "encrypted_data": encrypted_b64,
                 "encryption_method": "RSA-OAEP",
-                "timestamp": time.time()
+                "timestamp": time.time_ns()
             }
             
         except Exception as e:
-            with self.lock:
-                self.encryption_stats['encryption_errors'] += 1
+            next(self.encryption_stats['encryption_errors'])
             print(f"Error encrypting data: {e}")
             raise
             
     def get_encryption_stats(self) -> Dict[str, Any]:
         """Get encryption statistics"""
-        with self.lock:
-            total = self.encryption_stats['data_encrypted'] + self.encryption_stats['encryption_errors']
-            success_rate = (
-                self.encryption_stats['data_encrypted'] / total * 100
-                if total > 0 else 0
-            )
-            
-            return {
-                **self.encryption_stats,
-                'success_rate': round(success_rate, 2)
-            }
+        snapshot = {name: _count_value(counter)
+                    for name, counter in self.encryption_stats.items()}
+        total = snapshot['data_encrypted'] + snapshot['encryption_errors']
+        success_rate = (
+            snapshot['data_encrypted'] / total * 100
+            if total > 0 else 0
+        )
+
+        return {
+            **snapshot,
+            'success_rate': round(success_rate, 2)
+        }
 
 # Integration with volunteer client
 class SecureVolunteerClient:
@@ -287,56 +434,72 @@ class SecureVolunteerClient:
         self.batched_submission = BatchedSubmission(api_url)
         self.secure_transmission = SecureTransmission()
         self.is_running = False
-        self.collection_thread = None
+        self._loop_thread = None
+        self._loop = None
+        self._stop_event = None
         
     def _generate_anonymous_id(self) -> str:
         """Generate anonymous ID"""
-        return hashlib.sha256(str(time.time()).encode()).hexdigest()[:16]
+        return secrets.token_hex(8)
         
     def start_collection(self):
         """Start secure background collection"""
         if not self.is_running:
             self.is_running = True
-            self.collection_thread = threading.Thread(target=self._collection_loop, daemon=True)
-            self.collection_thread.start()
+            # One event-loop thread hosts collection and all in-flight
+            # submissions as asyncio tasks
+            self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+            self._loop_thread.start()
             print(f"Secure volunteer client started with ID: {self.anonymous_id}")
-            
+
     def stop_collection(self):
         """Stop background collection"""
         self.is_running = False
-        if self.collection_thread:
-            self.collection_thread.join()
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._loop_thread:
+            self._loop_thread.join()
+        self.batched_submission.stop()
         print("Secure volunteer client stopped")
-        
-    def _collection_loop(self):
+
+    def _run_loop(self):
+        """Run the asyncio event loop for collection and submission"""
+        asyncio.run(self._collection_loop())
+
+    async def _collection_loop(self):
         """Main collection loop with secure submission"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+
         while self.is_running:
             try:
                 # Collect data (in a real implementation, this would collect actual data)
                 data = self._collect_sample_data()
                 if data:
-                    # Queue for secure batched submission
+                    # Queue for secure batched submission; the consumer
+                    # thread handles batching and submission
                     self.batched_submission.queue_submission(data)
-                    
-                # Wait before next collection
-                time.sleep(30)  # Collect every 30 seconds
-                
+
+                # Wait before next collection; wakes immediately on stop
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    pass
+
             except Exception as e:
                 print(f"Error in secure collection loop: {e}")
-                time.sleep(5)  # Wait 5 seconds before retrying
+                await asyncio.sleep(5)  # Wait 5 seconds before retrying
                 
-    def _collect_sample_data(self) -> Optional[Dict[str, Any]]:
+    def _collect_sample_data(self) -> Optional[Submission]:
         """Collect sample data"""
         # This is a placeholder - in a real implementation, this would collect actual content
-        sample_data = {
-            "type": "statement",
-            "content": "This is a sample statement for secure demonstration",
-            "source": "secure_sample_source",
-            "timestamp": time.time(),
-            "context": "Secure sample context information"
-        }
-        
-        return sample_data
+        return Submission(
+            type="statement",
+            content="This is a sample statement for secure demonstration",
+            source="secure_sample_source",
+            timestamp=time.time(),
+            context="Secure sample context information"
+        )
         
     def submit_immediately(self, data: Dict[str, Any]) -> bool:
         """Submit data immediately through secure channel"""
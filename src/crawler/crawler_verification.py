@@ -1,9 +1,17 @@
+import concurrent.futures
+import functools
 import hashlib
-import json
+import heapq
+import itertools
+import numpy as np
+import orjson
+import os
+import queue
 import time
 import threading
+from operator import attrgetter
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 import base64
@@ -16,7 +24,76 @@ from cryptography.hazmat.backends import default_backend
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+def _count_value(counter) -> int:
+    """Read an itertools.count without advancing it"""
+    return counter.__reduce__()[1][0]
+
+# Padding and hash descriptors are stateless; build them once instead
+# of constructing fresh instances on every verify call
+_PKCS1V15 = padding.PKCS1v15()
+_SHA256 = hashes.SHA256()
+
+@functools.lru_cache(maxsize=256)
+def _load_public_key(public_key_pem: str):
+    """Parse a PEM public key once and reuse the key object
+
+    The ASN.1/PEM parse costs tens of microseconds; the cached
+    EVP_PKEY is reused by every subsequent verify against the same
+    crawler key.
+    """
+    return serialization.load_pem_public_key(
+        public_key_pem.encode(),
+        backend=default_backend()
+    )
+
+@functools.lru_cache(maxsize=256)
+def _key_fingerprint(public_key_pem: str) -> bytes:
+    """SHA-256 fingerprint of a key's DER encoding
+
+    Trust membership checks hash this 32-byte digest instead of the
+    multi-hundred-byte PEM string on every lookup.
+    """
+    der = _load_public_key(public_key_pem).public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).digest()
+
+@functools.lru_cache(maxsize=256)
+def _verifier_for(public_key_pem: str):
+    """Get a verify callable bound to a cached key
+
+    The closure captures the parsed key and the shared padding/hash
+    singletons, so the hot path is one dict probe plus one C call.
+    """
+    public_key = _load_public_key(public_key_pem)
+
+    def verify(signature_bytes: bytes, data: bytes) -> None:
+        public_key.verify(signature_bytes, data, _PKCS1V15, _SHA256)
+
+    return verify
+
+@functools.lru_cache(maxsize=16384)
+def _verify_signature_cached(public_key_pem: str, signature_bytes: bytes, canonical: bytes) -> bool:
+    """Verify a signature over canonical data bytes, memoized
+
+    Every verifier assigned to a request checks the same
+    (public key, signature, data) triple, so with N required
+    verifications only the first call pays for the RSA verify; the
+    rest are a dict probe. The bound is sized so crawler retries that
+    re-submit an identical payload hours later still hit the cache
+    instead of repeating the RSA modexp.
+    """
+    try:
+        _verifier_for(public_key_pem)(signature_bytes, canonical)
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Signature verification failed: {e}")
+        return False
+
+@dataclass(slots=True)
 class VerificationRequest:
     id: str
     data: Dict[str, Any]
@@ -25,10 +102,14 @@ class VerificationRequest:
     public_key: str
     submitted_at: float
     status: str  # 'pending', 'verified', 'rejected', 'conflict'
-    verification_result: Optional[Dict[str, Any]] = None
+    canonical: bytes = b''  # Sorted-key JSON of data, built once at submit
+    # Signature decoded from base64 once at submit; None means "not
+    # decoded yet", while empty bytes are a real (failing) signature
+    signature_bytes: Optional[bytes] = None
+    verification_results: List[Dict[str, Any]] = field(default_factory=list)
     verified_by: Optional[List[str]] = None  # List of verifier IDs
 
-@dataclass
+@dataclass(slots=True)
 class Verifier:
     id: str
     reputation_score: float  # 0.0 to 10.0
@@ -36,7 +117,7 @@ class Verifier:
     last_active: float
     performance_metrics: Dict[str, Any]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ConsensusResult:
     request_id: str
     data_hash: str
@@ -52,27 +133,77 @@ class CrawlerVerificationPipeline:
         """Initialize crawler verification pipeline"""
         self.required_verifications = required_verifications
         self.threshold = threshold
-        self.verification_requests = {}  # request_id -> VerificationRequest
+        self.verification_requests = {}  # request_id -> in-flight VerificationRequest
+        # Completed requests move here so the in-flight map — the one
+        # the loops and verifiers actually walk — stays small and
+        # cache-resident regardless of how much history accumulates
+        self._archive = {}  # request_id -> completed VerificationRequest
+        # Status indexes: the loops only ever care about pending and
+        # consensus-ready requests, so track those ids explicitly
+        # instead of filtering the whole request map every tick
+        self._pending_ids = set()
+        self._ready_ids = set()
         self.verifiers = {}  # verifier_id -> Verifier
+        # Read-mostly snapshot of the verifier set: writers rebuild the
+        # tuple under verifiers_lock, readers grab the reference with no
+        # lock. Slightly stale reads are fine against the 5-minute
+        # liveness window.
+        self._verifiers_snapshot = ()
+        # Liveness stamps live outside the Verifier objects: a plain
+        # dict store on an existing key is GIL-atomic, so assignments
+        # can stamp activity without touching verifiers_lock
+        self._verifier_last_active = {}
+        # Per-verifier (total, successful) verification tallies.
+        # itertools.count advances atomically under the GIL, so workers
+        # bump these without nesting verifiers_lock inside the request
+        # stripe lock.
+        self._verifier_counters = {}
         self.consensus_results = {}  # request_id -> ConsensusResult
         self.trusted_keys = set()  # Set of trusted public key PEMs
+        self._trusted_fps = set()  # DER fingerprints of trusted keys
         self.is_running = False
         self.verification_thread = None
         self.consensus_thread = None
+
+        # Request IDs only need to be unique, not unguessable: a random
+        # per-process prefix plus a monotonic counter avoids hashing the
+        # whole data dict on every submission
+        self._id_prefix = os.urandom(4).hex()
+        self._id_counter = itertools.count()
+
+        # Shared worker pool for verifications. Thread creation costs
+        # more than the GIL-released RSA verify itself, so reusing a
+        # fixed pool beats spawning a thread per assignment.
+        self._verify_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=16, thread_name_prefix="verify"
+        )
+
+        # Hand-off queue from submit to the verification loop, so new
+        # requests are assigned immediately instead of waiting for the
+        # next polling tick
+        self._task_q = queue.Queue()
         
-        # Performance metrics
+        # Performance metrics. Advancing an itertools.count is atomic
+        # under the GIL, so status transitions tally without a lock and
+        # stats reads are lock-free snapshots.
         self.stats = {
-            'total_requests': 0,
-            'verified_requests': 0,
-            'rejected_requests': 0,
-            'conflicts_resolved': 0
+            'total_requests': itertools.count(),
+            'verified_requests': itertools.count(),
+            'rejected_requests': itertools.count(),
+            'conflicts_resolved': itertools.count()
         }
-        
-        # Locks for thread safety
-        self.requests_lock = threading.Lock()
+
+        # Locks for thread safety. Request state is striped across 16
+        # locks by id hash so verifiers finishing different requests
+        # never contend; the id-set indexes are only ever touched with
+        # single GIL-atomic set operations.
+        self._req_locks = [threading.Lock() for _ in range(16)]
         self.verifiers_lock = threading.Lock()
         self.consensus_lock = threading.Lock()
-        self.stats_lock = threading.Lock()
+
+        # Signalled when a request becomes ready for consensus, so the
+        # consensus loop reacts immediately instead of polling
+        self._consensus_cv = threading.Condition()
         
     def start_pipeline(self):
         """Start the verification pipeline"""
@@ -94,37 +225,70 @@ class CrawlerVerificationPipeline:
     def stop_pipeline(self):
         """Stop the verification pipeline"""
         self.is_running = False
-        
+
+        # Wake both loops so they notice the shutdown immediately
+        self._task_q.put(None)
+        with self._consensus_cv:
+            self._consensus_cv.notify_all()
+
         if self.verification_thread:
             self.verification_thread.join(timeout=5)
             
         if self.consensus_thread:
             self.consensus_thread.join(timeout=5)
-            
+
+        self._verify_pool.shutdown(wait=False)
+
         logger.info("Crawler verification pipeline stopped")
         
     def add_trusted_key(self, public_key_pem: str):
         """Add a trusted public key"""
         self.trusted_keys.add(public_key_pem)
+        # Pre-warm the parse cache and index the short fingerprint so
+        # the first verify against this key stays off the parse path
+        try:
+            self._trusted_fps.add(_key_fingerprint(public_key_pem))
+        except Exception as e:
+            logger.error(f"Trusted key failed to parse: {e}")
         logger.info("Trusted key added")
-        
+
     def remove_trusted_key(self, public_key_pem: str):
         """Remove a trusted public key"""
         if public_key_pem in self.trusted_keys:
             self.trusted_keys.remove(public_key_pem)
+            try:
+                self._trusted_fps.discard(_key_fingerprint(public_key_pem))
+            except Exception:
+                pass
             logger.info("Trusted key removed")
-            
+
     def is_trusted_key(self, public_key_pem: str) -> bool:
         """Check if a public key is trusted"""
-        return public_key_pem in self.trusted_keys
+        # Hash the cached 32-byte fingerprint, not the multi-KB PEM
+        try:
+            return _key_fingerprint(public_key_pem) in self._trusted_fps
+        except Exception:
+            return False
+
+    def _lock_for(self, request_id: str) -> threading.Lock:
+        """Get the lock stripe that guards a request"""
+        return self._req_locks[hash(request_id) & 15]
         
     def submit_for_verification(self, data: Dict[str, Any], signature: str, 
                                crawler_id: str, public_key_pem: str) -> str:
         """Submit data for verification"""
         # Generate request ID
-        request_id = hashlib.sha256(f"{crawler_id}:{time.time()}:{hash(str(data))}".encode()).hexdigest()[:16]
+        request_id = f"{crawler_id}-{self._id_prefix}{next(self._id_counter):012x}"
         
-        # Create verification request
+        # Decode the signature once; a malformed one becomes empty bytes
+        # and fails verification the same way it always did
+        try:
+            signature_bytes = base64.b64decode(signature)
+        except Exception:
+            signature_bytes = b''
+
+        # Create verification request. Canonicalize once here; signature
+        # verification and the consensus data hash reuse the same bytes.
         request = VerificationRequest(
             id=request_id,
             data=data,
@@ -133,14 +297,20 @@ class CrawlerVerificationPipeline:
             public_key=public_key_pem,
             submitted_at=time.time(),
             status='pending',
+            canonical=orjson.dumps(data, option=orjson.OPT_SORT_KEYS),
+            signature_bytes=signature_bytes,
             verified_by=[]
         )
         
         # Add to verification queue
-        with self.requests_lock:
+        with self._lock_for(request_id):
             self.verification_requests[request_id] = request
-            self.stats['total_requests'] += 1
-            
+            self._pending_ids.add(request_id)
+        next(self.stats['total_requests'])
+
+        # Wake the verification loop for immediate assignment
+        self._task_q.put(request_id)
+
         logger.info(f"Verification request {request_id} submitted for crawler {crawler_id}")
         return request_id
         
@@ -156,33 +326,52 @@ class CrawlerVerificationPipeline:
         
         with self.verifiers_lock:
             self.verifiers[verifier_id] = verifier
-            
+            self._verifier_last_active[verifier_id] = verifier.last_active
+            self._verifier_counters[verifier_id] = (itertools.count(), itertools.count())
+            self._verifiers_snapshot = tuple(self.verifiers.values())
+
         logger.info(f"Verifier {verifier_id} registered with capabilities: {capabilities}")
         
     def _verification_loop(self):
         """Main verification loop"""
         while self.is_running:
             try:
-                # Get pending requests
-                pending_requests = self._get_pending_requests()
-                
-                # Assign requests to verifiers
-                for request in pending_requests:
+                # Block on the hand-off queue; latency is one queue
+                # hand-off instead of up to a full polling interval
+                try:
+                    request_id = self._task_q.get(timeout=5)
+                except queue.Empty:
+                    # Retry sweep for requests still short of votes:
+                    # no capable verifier was online earlier, or only a
+                    # partial assignment was possible
+                    for request in self._get_pending_requests():
+                        if len(request.verified_by) < self.required_verifications:
+                            self._assign_request_to_verifiers(request)
+                    continue
+
+                if request_id is None:  # Shutdown sentinel
+                    continue
+
+                request = self.verification_requests.get(request_id)
+
+                if request is not None and request.status == 'pending':
                     self._assign_request_to_verifiers(request)
-                    
-                time.sleep(5)  # Check every 5 seconds
-                
+
             except Exception as e:
                 logger.error(f"Error in verification loop: {e}")
                 time.sleep(5)
                 
     def _get_pending_requests(self) -> List[VerificationRequest]:
         """Get list of pending verification requests"""
-        with self.requests_lock:
-            return [
-                request for request in self.verification_requests.values()
-                if request.status == 'pending'
-            ]
+        # list() of the id set is a single C-level copy, so no lock is
+        # needed; a request finishing mid-snapshot just shows up once
+        # more and is filtered by status downstream
+        pending = []
+        for rid in list(self._pending_ids):
+            request = self.verification_requests.get(rid)
+            if request is not None:
+                pending.append(request)
+        return pending
             
     def _assign_request_to_verifiers(self, request: VerificationRequest):
         """Assign verification request to available verifiers"""
@@ -190,18 +379,25 @@ class CrawlerVerificationPipeline:
         
         if not available_verifiers:
             return
-            
+
+        # Only the shortfall is assigned on a retry, and verifiers that
+        # already voted are excluded so one verifier can't count twice
+        already_voted = set(request.verified_by)
+        needed = self.required_verifications - len(already_voted)
+        if needed <= 0:
+            return
+
         # Filter verifiers by capabilities
         capable_verifiers = [
-            v for v in available_verifiers 
-            if self._is_verifier_capable(v, request)
+            v for v in available_verifiers
+            if v.id not in already_voted and self._is_verifier_capable(v, request)
         ]
-        
+
         if not capable_verifiers:
             return
-            
+
         # Select verifiers based on reputation and availability
-        selected_verifiers = self._select_verifiers(capable_verifiers, self.required_verifications)
+        selected_verifiers = self._select_verifiers(capable_verifiers, needed)
         
         # Assign request to selected verifiers
         for verifier in selected_verifiers:
@@ -209,12 +405,13 @@ class CrawlerVerificationPipeline:
             
     def _get_available_verifiers(self) -> List[Verifier]:
         """Get list of available verifiers"""
-        with self.verifiers_lock:
-            current_time = time.time()
-            return [
-                verifier for verifier in self.verifiers.values()
-                if (current_time - verifier.last_active) < 300  # Active within last 5 minutes
-            ]
+        # Lock-free read of the copy-on-write snapshot and the stamps
+        current_time = time.time()
+        last_active = self._verifier_last_active
+        return [
+            verifier for verifier in self._verifiers_snapshot
+            if (current_time - last_active.get(verifier.id, verifier.last_active)) < 300
+        ]
             
     def _is_verifier_capable(self, verifier: Verifier, request: VerificationRequest) -> bool:
         """Check if verifier is capable of verifying this request"""
@@ -226,19 +423,9 @@ class CrawlerVerificationPipeline:
         """Select verifiers based on reputation and diversity"""
         if len(verifiers) <= count:
             return verifiers
-            
-        # Weight verifiers by reputation score
-        weighted_verifiers = []
-        for verifier in verifiers:
-            weight = verifier.reputation_score
-            weighted_verifiers.append((verifier, weight))
-            
-        # Sort by weight (higher reputation first)
-        weighted_verifiers.sort(key=lambda x: x[1], reverse=True)
-        
-        # Select top verifiers
-        selected = [v[0] for v in weighted_verifiers[:count]]
-        return selected
+
+        # Top-k by reputation: O(V log k) instead of a full sort
+        return heapq.nlargest(count, verifiers, key=attrgetter('reputation_score'))
         
     def _assign_request_to_verifier(self, request: VerificationRequest, verifier: Verifier):
         """Assign request to a specific verifier"""
@@ -247,18 +434,12 @@ class CrawlerVerificationPipeline:
             # For now, we'll simulate the verification process
             logger.info(f"Assigning request {request.id} to verifier {verifier.id}")
             
-            # Update verifier last active time
-            with self.verifiers_lock:
-                if verifier.id in self.verifiers:
-                    self.verifiers[verifier.id].last_active = time.time()
-                    
-            # Start verification in a separate thread
-            verify_thread = threading.Thread(
-                target=self._execute_verification, 
-                args=(request, verifier), 
-                daemon=True
-            )
-            verify_thread.start()
+            # Stamp activity lock-free; the key exists from registration
+            self._verifier_last_active[verifier.id] = time.time()
+
+
+            # Hand verification to the shared worker pool
+            self._verify_pool.submit(self._execute_verification, request, verifier)
             
         except Exception as e:
             logger.error(f"Error assigning request {request.id} to verifier {verifier.id}: {e}")
@@ -269,7 +450,7 @@ class CrawlerVerificationPipeline:
             logger.info(f"Verifying request {request.id} with verifier {verifier.id}")
             
             # Verify signature
-            is_valid = self._verify_signature(request.data, request.signature, request.public_key)
+            is_valid = self._verify_signature(request)
             
             # Verify crawler is trusted
             is_trusted = self.is_trusted_key(request.public_key)
@@ -283,131 +464,172 @@ class CrawlerVerificationPipeline:
                 "confidence": min(1.0, (is_valid + is_trusted) / 2.0)  # Simple confidence calculation
             }
             
-            # Update request
-            with self.requests_lock:
+            # Update request under its lock stripe
+            ready_for_consensus = False
+            with self._lock_for(request.id):
                 if request.id in self.verification_requests:
-                    self.verification_requests[request.id].verification_result = verification_result
-                    self.verification_requests[request.id].verified_by.append(verifier.id)
-                    
-                    # Update verifier performance metrics
-                    with self.verifiers_lock:
-                        if verifier.id in self.verifiers:
-                            verifier_stats = self.verifiers[verifier.id].performance_metrics
-                            verifier_stats['total_verifications'] = verifier_stats.get('total_verifications', 0) + 1
-                            if is_valid and is_trusted:
-                                verifier_stats['successful_verifications'] = verifier_stats.get('successful_verifications', 0) + 1
-                                
+                    stored = self.verification_requests[request.id]
+                    # A retry sweep can race a vote already in flight;
+                    # drop the duplicate instead of double-counting
+                    if verifier.id in stored.verified_by:
+                        return
+                    stored.verification_results.append(verification_result)
+                    stored.verified_by.append(verifier.id)
+
+                    # Enough verifications collected: promote the id so
+                    # the consensus loop only looks at ready requests
+                    if len(stored.verified_by) >= self.required_verifications:
+                        self._pending_ids.discard(request.id)
+                        self._ready_ids.add(request.id)
+                        ready_for_consensus = True
+
+            # Update verifier performance metrics outside any lock:
+            # advancing an itertools.count is GIL-atomic
+            counters = self._verifier_counters.get(verifier.id)
+            if counters is not None:
+                next(counters[0])
+                if is_valid and is_trusted:
+                    next(counters[1])
+
+            # Signal outside the stripe lock to keep hold times short
+            if ready_for_consensus:
+                with self._consensus_cv:
+                    self._consensus_cv.notify()
+
             logger.info(f"Verification completed for request {request.id} by verifier {verifier.id}")
             
         except Exception as e:
             logger.error(f"Error verifying request {request.id} with verifier {verifier.id}: {e}")
             
-    def _verify_signature(self, data: Dict[str, Any], signature: str, public_key_pem: str) -> bool:
-        """Verify data signature"""
-        try:
-            # Load public key
-            public_key = serialization.load_pem_public_key(
-                public_key_pem.encode(),
-                backend=default_backend()
-            )
-            
-            # Convert data to JSON string and encode
-            data_json = json.dumps(data, sort_keys=True)
-            data_bytes = data_json.encode('utf-8')
-            
-            # Decode signature from base64
-            signature_bytes = base64.b64decode(signature.encode('utf-8'))
-            
-            # Verify signature
-            public_key.verify(
-                signature_bytes,
-                data_bytes,
-                padding.PKCS1v15(),
-                hashes.SHA256()
-            )
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Signature verification failed: {e}")
-            return False
+    def _verify_signature(self, request: VerificationRequest) -> bool:
+        """Verify a request's data signature"""
+        # Canonical bytes are hashable, so the memoizer can key on them
+        canonical = request.canonical or orjson.dumps(request.data, option=orjson.OPT_SORT_KEYS)
+        signature_bytes = request.signature_bytes
+        if signature_bytes is None:
+            # Lazy fallback for requests built without the decoded form;
+            # malformed base64 fails verification instead of raising
+            try:
+                signature_bytes = base64.b64decode(request.signature)
+            except Exception:
+                return False
+        return _verify_signature_cached(request.public_key, signature_bytes, canonical)
             
     def _consensus_loop(self):
         """Main consensus loop"""
         while self.is_running:
             try:
-                # Check for requests ready for consensus
+                # Sleep until a request becomes ready; the timeout is
+                # only a safety net against a missed notification
+                with self._consensus_cv:
+                    self._consensus_cv.wait_for(
+                        lambda: self._ready_ids or not self.is_running,
+                        timeout=30
+                    )
+
+                # Tally the whole ready batch in one vectorized pass,
+                # then finish each request's bookkeeping
                 ready_requests = self._get_ready_for_consensus()
-                
-                # Process consensus for each request
-                for request in ready_requests:
-                    self._process_consensus(request)
-                    
-                time.sleep(10)  # Check every 10 seconds
-                
+                if ready_requests:
+                    verified_counts = self._tally_votes(ready_requests)
+                    for request, verified_count in zip(ready_requests, verified_counts):
+                        self._process_consensus(request, int(verified_count))
+
             except Exception as e:
                 logger.error(f"Error in consensus loop: {e}")
                 time.sleep(5)
                 
     def _get_ready_for_consensus(self) -> List[VerificationRequest]:
         """Get list of requests ready for consensus"""
-        with self.requests_lock:
-            return [
-                request for request in self.verification_requests.values()
-                if (request.status == 'pending' and 
-                    len(request.verified_by or []) >= self.required_verifications)
-            ]
-            
-    def _process_consensus(self, request: VerificationRequest):
+        ready = []
+        for rid in list(self._ready_ids):
+            request = self.verification_requests.get(rid)
+            if request is not None:
+                ready.append(request)
+        return ready
+            
+    @staticmethod
+    def _tally_votes(ready_requests: List[VerificationRequest]) -> np.ndarray:
+        """Count verified votes for a batch of requests in one C pass
+
+        Vote flags across all requests are flattened into one uint8
+        array and summed per request with np.add.reduceat, replacing a
+        Python-level loop per request.
+        """
+        lengths = np.fromiter(
+            (len(r.verification_results) for r in ready_requests),
+            dtype=np.intp, count=len(ready_requests)
+        )
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(len(ready_requests), dtype=np.intp)
+
+        votes = np.fromiter(
+            (1 if v.get('is_valid_signature') and v.get('is_trusted_crawler') else 0
+             for r in ready_requests for v in r.verification_results),
+            dtype=np.uint8, count=total
+        )
+
+        offsets = np.zeros(len(ready_requests), dtype=np.intp)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        counts = np.add.reduceat(votes, offsets).astype(np.intp)
+        # reduceat yields a bogus value for zero-length segments
+        counts[lengths == 0] = 0
+        return counts
+
+    def _process_consensus(self, request: VerificationRequest, verified_count: Optional[int] = None):
         """Process consensus for a request"""
         try:
             # Calculate consensus
-            consensus_result = self._calculate_consensus(request)
+            consensus_result = self._calculate_consensus(request, verified_count)
             
             # Store consensus result
             with self.consensus_lock:
                 self.consensus_results[request.id] = consensus_result
                 
-            # Update request status
-            with self.requests_lock:
-                if request.id in self.verification_requests:
-                    self.verification_requests[request.id].status = consensus_result.final_status
+            # Retire the request: stamp its final status and move it out
+            # of the in-flight map into the archive
+            with self._lock_for(request.id):
+                stored = self.verification_requests.pop(request.id, None)
+                if stored is not None:
+                    stored.status = consensus_result.final_status
+                    self._archive[request.id] = stored
+                self._ready_ids.discard(request.id)
+                self._pending_ids.discard(request.id)
                     
-            # Update statistics
-            with self.stats_lock:
-                if consensus_result.final_status == 'verified':
-                    self.stats['verified_requests'] += 1
-                elif consensus_result.final_status == 'rejected':
-                    self.stats['rejected_requests'] += 1
+            # Update statistics (atomic counter advance, no lock)
+            if consensus_result.final_status == 'verified':
+                next(self.stats['verified_requests'])
+            elif consensus_result.final_status == 'rejected':
+                next(self.stats['rejected_requests'])
                     
             logger.info(f"Consensus reached for request {request.id}: {consensus_result.final_status}")
             
         except Exception as e:
             logger.error(f"Error processing consensus for request {request.id}: {e}")
             
-    def _calculate_consensus(self, request: VerificationRequest) -> ConsensusResult:
+    def _calculate_consensus(self, request: VerificationRequest,
+                             verified_count: Optional[int] = None) -> ConsensusResult:
         """Calculate consensus for a request"""
-        # Calculate data hash
-        data_hash = hashlib.sha256(
-            json.dumps(request.data, sort_keys=True).encode()
-        ).hexdigest()
-        
-        # Count verified vs rejected
-        verified_count = 0
-        rejected_count = 0
-        total_verifications = len(request.verified_by or [])
+        # Calculate data hash over the canonical bytes built at submit.
+        # The hash is an identity/dedup key, not security material, so
+        # let hashlib pick the fastest available SHA-256 implementation.
+        canonical = request.canonical or orjson.dumps(request.data, option=orjson.OPT_SORT_KEYS)
+        data_hash = hashlib.sha256(canonical, usedforsecurity=False).hexdigest()
         
-        # In a real implementation, we would analyze verification results
-        # For now, we'll simulate based on signature validity and trusted status
-        if request.verification_result:
-            is_valid = request.verification_result.get('is_valid_signature', False)
-            is_trusted = request.verification_result.get('is_trusted_crawler', False)
-            
-            if is_valid and is_trusted:
-                verified_count = total_verifications
-            else:
-                rejected_count = total_verifications
-                
+        # Tally every verifier's vote; each result is an independent
+        # signature and trust check. Batched callers pass the count
+        # from the vectorized tally; the sum() covers direct calls.
+        results = request.verification_results
+        total_verifications = len(results)
+        if verified_count is None:
+            verified_count = sum(
+                1 for r in results
+                if r.get('is_valid_signature') and r.get('is_trusted_crawler')
+            )
+        rejected_count = total_verifications - verified_count
+
+
         # Calculate confidence level
         confidence_level = max(verified_count, rejected_count) / total_verifications if total_verifications > 0 else 0
         
@@ -437,29 +659,42 @@ class CrawlerVerificationPipeline:
             
     def get_pipeline_stats(self) -> Dict[str, Any]:
         """Get pipeline statistics"""
-        with self.stats_lock:
-            total = self.stats['total_requests']
-            success_rate = (
-                (self.stats['verified_requests'] + self.stats['rejected_requests']) / total * 100
-                if total > 0 else 0
-            )
-            
-            return {
-                **self.stats,
-                'success_rate': round(success_rate, 2),
-                'pending_requests': len(self._get_pending_requests()),
-                'active_verifiers': len(self._get_available_verifiers())
-            }
+        snapshot = {name: _count_value(counter) for name, counter in self.stats.items()}
+        total = snapshot['total_requests']
+        success_rate = (
+            (snapshot['verified_requests'] + snapshot['rejected_requests']) / total * 100
+            if total > 0 else 0
+        )
+
+        return {
+            **snapshot,
+            'success_rate': round(success_rate, 2),
+            'pending_requests': len(self._pending_ids),
+            'active_verifiers': len(self._get_available_verifiers())
+        }
             
+    def _refresh_performance_metrics(self, verifier: Verifier):
+        """Fold the atomic tallies back into performance_metrics"""
+        counters = self._verifier_counters.get(verifier.id)
+        if counters is not None:
+            verifier.performance_metrics['total_verifications'] = _count_value(counters[0])
+            verifier.performance_metrics['successful_verifications'] = _count_value(counters[1])
+
     def get_verifier_info(self, verifier_id: str) -> Optional[Verifier]:
         """Get information about a specific verifier"""
         with self.verifiers_lock:
-            return self.verifiers.get(verifier_id)
-            
+            verifier = self.verifiers.get(verifier_id)
+        if verifier is not None:
+            self._refresh_performance_metrics(verifier)
+        return verifier
+
     def get_all_verifiers(self) -> Dict[str, Verifier]:
         """Get information about all verifiers"""
         with self.verifiers_lock:
-            return self.verifiers.copy()
+            verifiers = self.verifiers.copy()
+        for verifier in verifiers.values():
+            self._refresh_performance_metrics(verifier)
+        return verifiers
             
     def update_verifier_reputation(self, verifier_id: str, score_change: float):
         """Update verifier reputation score"""
@@ -468,6 +703,7 @@ class CrawlerVerificationPipeline:
                 current_score = self.verifiers[verifier_id].reputation_score
                 new_score = max(0.0, min(10.0, current_score + score_change))
                 self.verifiers[verifier_id].reputation_score = new_score
+                self._verifiers_snapshot = tuple(self.verifiers.values())
                 logger.info(f"Verifier {verifier_id} reputation updated to {new_score}")
 
 # Example usage
@@ -1,11 +1,14 @@
-import hashlib
+import concurrent.futures
+import heapq
 import json
+import queue
 import time
 import threading
 import asyncio
-import random
+import uuid
+from collections import defaultdict
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 
@@ -13,6 +16,9 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Heap ordering for task priorities; unknown priorities rank as medium
+_PRIORITY_RANK = {'high': 1, 'medium': 2, 'low': 3}
+
 @dataclass
 class CrawlTask:
     id: str
@@ -25,6 +31,9 @@ class CrawlTask:
     status: str = 'pending'  # 'pending', 'assigned', 'crawling', 'completed', 'failed'
     result: Optional[Dict[str, Any]] = None
     retry_count: int = 0
+    # Guards this task's mutable fields, so workers on different tasks
+    # never contend with each other
+    lock: threading.Lock = field(default_factory=threading.Lock)
 
 @dataclass
 class CrawlerNode:
@@ -47,18 +56,46 @@ class CrawlResult:
     verified: bool = False
 
 class DistributedCrawler:
+    # Max tasks popped per shard per tick under one lock acquisition
+    _ASSIGN_BATCH = 64
+
     def __init__(self, max_retries: int = 3, default_timeout: int = 300):
         """Initialize distributed crawler"""
         self.max_retries = max_retries
         self.default_timeout = default_timeout
         self.crawl_tasks = {}  # task_id -> CrawlTask
         self.crawler_nodes = {}  # crawler_id -> CrawlerNode
-        self.task_queue = []  # List of unassigned tasks
+        # Pending tasks are sharded into one min-heap per source type,
+        # each ordered by (priority_rank, submitted_at, task_id); the
+        # assignment loop skips whole shards no online crawler can
+        # serve. Cancels are lazy — the id goes into _cancelled_ids and
+        # the entry is dropped when it surfaces at the top of its heap.
+        self.queues = defaultdict(list)
+        self._queued = 0  # Total entries across all sub-queues
+        self._cancelled_ids = set()
+        # Side-channel for retries: workers drop task ids here without
+        # touching queue_lock, and the assignment loop folds them back
+        # into the heaps at the top of its tick
+        self.retry_queue = queue.SimpleQueue()
+        # capability -> set of crawler ids able to serve it
+        self.capability_index = defaultdict(set)
+        # capability -> max-heap of (-score, crawler_id) snapshots; the
+        # '*' key holds every crawler and serves generic tasks. Entries
+        # are pushed on each load or metrics change and validated
+        # lazily on pop, so selection never rescores the whole fleet.
+        self.crawler_scores = defaultdict(list)
         self.crawl_results = {}  # task_id -> CrawlResult
         self.is_running = False
         self.assignment_thread = None
         self.monitoring_thread = None
         self.heartbeat_interval = 30  # seconds
+
+        # Bounded worker pool for crawl execution: reusing threads
+        # avoids the per-task creation cost and caps concurrency
+        # instead of spawning an OS thread per crawl
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=64, thread_name_prefix='crawl'
+        )
         
         # Performance metrics
         self.stats = {
@@ -68,9 +105,20 @@ class DistributedCrawler:
             'active_crawlers': 0
         }
         
-        # Locks for thread safety
-        self.tasks_lock = threading.Lock()
+        # Locks for thread safety. Queue structure and task-map
+        # membership have their own locks; each task's mutable fields
+        # are guarded by the lock on the task itself, so workers
+        # executing different tasks never serialize on shared state.
+        self.queue_lock = threading.Lock()
+        # Wakes the assignment loop when work or capacity appears:
+        # notified on submit, retry, heartbeat and crawl completion
+        self.queue_cv = threading.Condition(self.queue_lock)
+        self.task_map_lock = threading.Lock()
         self.crawlers_lock = threading.Lock()
+        # Count of crawlers with status 'active', bumped on every
+        # status transition under crawlers_lock, so stats reads never
+        # rescan the whole node table
+        self._active_count = 0
         self.results_lock = threading.Lock()
         self.stats_lock = threading.Lock()
         
@@ -94,13 +142,19 @@ class DistributedCrawler:
     def stop_crawler(self):
         """Stop the distributed crawler"""
         self.is_running = False
-        
+
+        # Wake the assignment loop so it notices the shutdown
+        with self.queue_cv:
+            self.queue_cv.notify_all()
+
         if self.assignment_thread:
             self.assignment_thread.join(timeout=5)
             
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5)
-            
+
+        self.executor.shutdown(wait=True)
+
         logger.info("Distributed crawler stopped")
         
     def register_crawler(self, crawler_id: str, address: str, port: int, capabilities: List[str]):
@@ -117,120 +171,229 @@ class DistributedCrawler:
         )
         
         with self.crawlers_lock:
+            previous = self.crawler_nodes.get(crawler_id)
             self.crawler_nodes[crawler_id] = crawler
-            self.stats['active_crawlers'] = len([c for c in self.crawler_nodes.values() if c.status == 'active'])
-            
+            for capability in capabilities:
+                self.capability_index[capability].add(crawler_id)
+            if previous is None or previous.status != 'active':
+                self._active_count += 1
+            self._reindex_crawler(crawler)
+
+        # New capacity: wake the assignment loop for any parked tasks
+        with self.queue_cv:
+            self.queue_cv.notify()
+
         logger.info(f"Crawler {crawler_id} registered with capabilities: {capabilities}")
         
     def submit_crawl_task(self, source_type: str, url: str, priority: str = 'medium',
                          deadline: Optional[float] = None) -> str:
         """Submit a crawl task to the distributed crawler"""
-        # Generate task ID
-        task_id = hashlib.sha256(f"{source_type}:{url}:{time.time()}:{random.random()}".encode()).hexdigest()[:16]
-        
-        # Create task
+        # Generate task ID: IDs only need uniqueness, and uuid4 pulls
+        # straight from the OS CSPRNG without a hash round
+        task_id = uuid.uuid4().hex[:16]
+
+        # Create task; one timestamp serves both fields
+        now = time.time()
         task = CrawlTask(
             id=task_id,
             source_type=source_type,
             url=url,
             priority=priority,
-            submitted_at=time.time(),
-            deadline=deadline or (time.time() + self.default_timeout)
+            submitted_at=now,
+            deadline=deadline or (now + self.default_timeout)
         )
         
         # Add to task queue
-        with self.tasks_lock:
+        with self.task_map_lock:
             self.crawl_tasks[task_id] = task
-            self.task_queue.append(task)
+        with self.queue_cv:
+            self._enqueue(task)
+            self.queue_cv.notify()
+        with self.stats_lock:
             self.stats['total_tasks'] += 1
             
         logger.info(f"Crawl task {task_id} submitted for {source_type}: {url}")
         return task_id
-        
+
+    def _enqueue(self, task: CrawlTask):
+        """Push a task onto its source-type sub-queue"""
+        heapq.heappush(
+            self.queues[task.source_type],
+            (_PRIORITY_RANK.get(task.priority, 2), task.submitted_at, task.id)
+        )
+        self._queued += 1
+
     def _assignment_loop(self):
         """Main task assignment loop"""
         while self.is_running:
             try:
-                # Process tasks in queue
-                if self.task_queue:
-                    self._assign_tasks()
-                    
-                time.sleep(2)  # Check every 2 seconds
-                
+                # Sleep until work or capacity shows up; the timeout is
+                # a safety net for deadline expiry and missed wakeups
+                with self.queue_cv:
+                    self.queue_cv.wait_for(
+                        lambda: self._queued
+                        or not self.retry_queue.empty()
+                        or not self.is_running,
+                        timeout=5
+                    )
+
+                progress = False
+                if self._queued or not self.retry_queue.empty():
+                    progress = self._assign_tasks()
+
+                # Tasks can be queued with nothing able to serve them
+                # (every crawler offline); a pass that changed nothing
+                # parks here until a submit, heartbeat or completion
+                # notifies, instead of spinning on pop-and-requeue. The
+                # timeout keeps deadline expiry checks alive.
+                if not progress and self.is_running:
+                    with self.queue_cv:
+                        self.queue_cv.wait(timeout=5)
+
             except Exception as e:
                 logger.error(f"Error in assignment loop: {e}")
                 time.sleep(5)
                 
-    def _assign_tasks(self):
-        """Assign tasks to available crawlers"""
-        # Sort tasks by priority
-        self.task_queue.sort(key=lambda x: {'high': 1, 'medium': 2, 'low': 3}.get(x.priority, 2))
-        
-        for task in self.task_queue[:]:  # Copy to avoid modification during iteration
-            # Check if task has expired
-            if task.deadline and time.time() > task.deadline:
-                self._handle_task_timeout(task)
+    def _assign_tasks(self) -> bool:
+        """Assign tasks to available crawlers
+
+        Returns True when the pass changed state — assigned, expired or
+        dropped at least one task — so the caller can tell an idle
+        requeue-only pass apart and park instead of spinning.
+        """
+        # Fold retried tasks back into the heaps before assigning
+        retried = []
+        while True:
+            try:
+                retried.append(self.retry_queue.get_nowait())
+            except queue.Empty:
+                break
+        if retried:
+            with self.queue_lock:
+                for task_id in retried:
+                    task = self.crawl_tasks.get(task_id)
+                    if task is not None:
+                        self._enqueue(task)
+
+        # One timestamp per tick; deadlines don't need finer grain
+        now = time.time()
+        progress = False
+        for source_type, heap in list(self.queues.items()):
+            if not heap:
                 continue
-                
-            # Select crawler based on source type and capabilities
-            crawler = self._select_crawler(task)
-            
-            if crawler:
-                # Assign task to crawler
-                success = self._assign_task_to_crawler(task, crawler)
-                if success:
-                    self.task_queue.remove(task)
+
+            # Skip whole shards no online crawler can serve; generic
+            # tasks may run on any crawler, so their shard always runs
+            if source_type != 'generic' and not self.capability_index[source_type]:
+                continue
+
+            # Pop a batch of best-first entries under one lock
+            # acquisition, then assign with the lock released, so the
+            # tick costs O(1) lock round-trips instead of one per task
+            with self.queue_lock:
+                batch = []
+                while heap and len(batch) < self._ASSIGN_BATCH:
+                    batch.append(heapq.heappop(heap))
+                self._queued -= len(batch)
+
+            requeue = []
+            for entry in batch:
+                task_id = entry[2]
+
+                # Lazily drop cancelled tasks as they surface
+                if task_id in self._cancelled_ids:
+                    self._cancelled_ids.discard(task_id)
+                    progress = True
+                    continue
+
+                task = self.crawl_tasks.get(task_id)
+                if task is None or task.status != 'pending':
+                    progress = True
+                    continue
+
+                # Check if task has expired
+                if task.deadline and now > task.deadline:
+                    self._handle_task_timeout(task)
+                    progress = True
+                    continue
+
+                # Select crawler based on source type and capabilities
+                crawler = self._select_crawler(task)
+
+                if crawler and self._assign_task_to_crawler(task, crawler):
+                    progress = True
+                    continue
+
+                # Assignment can also fail because the task stopped
+                # being pending mid-pass (a cancel won the locked
+                # re-check); drop it and its lazy-cancel marker
+                if task.status != 'pending':
+                    self._cancelled_ids.discard(task_id)
+                    progress = True
+                    continue
+
+                # No capable crawler right now; keep the task queued
+                requeue.append(entry)
+
+            with self.queue_lock:
+                for entry in requeue:
+                    heapq.heappush(heap, entry)
+                    self._queued += 1
+
+        return progress
                     
     def _select_crawler(self, task: CrawlTask) -> Optional[CrawlerNode]:
         """Select the best crawler for a task"""
-        available_crawlers = self._get_available_crawlers()
-        
-        if not available_crawlers:
-            return None
-            
-        # Filter crawlers by capabilities
-        capable_crawlers = [
-            c for c in available_crawlers 
-            if task.source_type in c.capabilities or task.source_type == 'generic'
-        ]
-        
-        if not capable_crawlers:
-            return None
-            
-        # Select crawler based on performance and load
-        return self._select_best_crawler(capable_crawlers)
-        
-    def _get_available_crawlers(self) -> List[CrawlerNode]:
-        """Get list of available crawlers"""
+        key = '*' if task.source_type == 'generic' else task.source_type
+        return self._select_best_crawler(key)
+
+    @staticmethod
+    def _crawler_score(crawler: CrawlerNode) -> float:
+        """Selection score: performance minus load penalty"""
+        # Performance score (0-1) minus load factor (0-0.5)
+        load_factor = min(0.5, crawler.current_load / 10.0)  # Assume max 10 tasks per crawler
+        return crawler.performance_metrics.get('success_rate', 0.8) - load_factor
+
+    def _reindex_crawler(self, crawler: CrawlerNode):
+        """Push fresh score entries for a crawler; caller holds crawlers_lock"""
+        entry = (-self._crawler_score(crawler), crawler.id)
+        for capability in crawler.capabilities:
+            heapq.heappush(self.crawler_scores[capability], entry)
+        heapq.heappush(self.crawler_scores['*'], entry)
+
+    def _select_best_crawler(self, key: str) -> Optional[CrawlerNode]:
+        """Pop the best-scored active crawler from a capability heap
+
+        Heap entries are score snapshots, so the top may be stale or a
+        duplicate. Popping discards entries for missing or inactive
+        crawlers and reinserts any whose recorded score no longer
+        matches; the first entry that validates wins. The winner's
+        entry is consumed, and the load change on assignment pushes a
+        fresh one.
+        """
         with self.crawlers_lock:
-            return [
-                crawler for crawler in self.crawler_nodes.values()
-                if crawler.status == 'active'
-            ]
-            
-    def _select_best_crawler(self, crawlers: List[CrawlerNode]) -> Optional[CrawlerNode]:
-        """Select the best crawler based on performance and load"""
-        if not crawlers:
-            return None
-            
-        # Score crawlers based on performance and load
-        scored_crawlers = []
-        for crawler in crawlers:
-            # Performance score (0-1) minus load factor (0-0.5)
-            load_factor = min(0.5, crawler.current_load / 10.0)  # Assume max 10 tasks per crawler
-            performance_score = crawler.performance_metrics.get('success_rate', 0.8)
-            score = performance_score - load_factor
-            scored_crawlers.append((crawler, score))
-            
-        # Sort by score (highest first)
-        scored_crawlers.sort(key=lambda x: x[1], reverse=True)
-        
-        return scored_crawlers[0][0] if scored_crawlers else None
+            heap = self.crawler_scores[key]
+            while heap:
+                neg_score, crawler_id = heapq.heappop(heap)
+                crawler = self.crawler_nodes.get(crawler_id)
+                if crawler is None or crawler.status != 'active':
+                    continue
+                current = self._crawler_score(crawler)
+                if -neg_score != current:
+                    heapq.heappush(heap, (-current, crawler_id))
+                    continue
+                return crawler
+        return None
         
     def _assign_task_to_crawler(self, task: CrawlTask, crawler: CrawlerNode) -> bool:
         """Assign task to a specific crawler"""
         try:
-            with self.tasks_lock:
+            with task.lock:
+                # Re-check under the lock: cancel_crawl_task can win
+                # the race after the queue-side status check, and its
+                # update must not be overwritten here
+                if task.status != 'pending':
+                    return False
                 task.assigned_crawler = crawler.id
                 task.status = 'assigned'
                 
@@ -242,10 +405,10 @@ class DistributedCrawler:
             with self.crawlers_lock:
                 if crawler.id in self.crawler_nodes:
                     self.crawler_nodes[crawler.id].current_load += 1
+                    self._reindex_crawler(self.crawler_nodes[crawler.id])
                     
-            # Start crawling in a separate thread
-            crawl_thread = threading.Thread(target=self._execute_crawl_task, args=(task, crawler), daemon=True)
-            crawl_thread.start()
+            # Hand the crawl to the bounded worker pool
+            self.executor.submit(self._execute_crawl_task, task, crawler)
             
             return True
             
@@ -258,7 +421,7 @@ class DistributedCrawler:
         start_time = time.time()
         
         try:
-            with self.tasks_lock:
+            with task.lock:
                 task.status = 'crawling'
                 
             logger.info(f"Crawling {task.url} with crawler {crawler.id}")
@@ -266,22 +429,23 @@ class DistributedCrawler:
             # Simulate crawling process
             crawl_result = self._simulate_crawling(task)
             
-            # Calculate processing time
-            processing_time = time.time() - start_time
-            
+            # Calculate processing time; reuse the timestamp below
+            end_time = time.time()
+            processing_time = end_time - start_time
+
             # Store result
             with self.results_lock:
                 self.crawl_results[task.id] = CrawlResult(
                     task_id=task.id,
                     data=crawl_result,
                     crawler_id=crawler.id,
-                    crawled_at=time.time(),
+                    crawled_at=end_time,
                     processing_time=processing_time,
                     verified=False
                 )
                 
             # Update task status
-            with self.tasks_lock:
+            with task.lock:
                 task.status = 'completed'
                 task.result = crawl_result
                 
@@ -295,12 +459,17 @@ class DistributedCrawler:
             with self.crawlers_lock:
                 if crawler.id in self.crawler_nodes:
                     self.crawler_nodes[crawler.id].current_load = max(0, self.crawler_nodes[crawler.id].current_load - 1)
-                    
+                    self._reindex_crawler(self.crawler_nodes[crawler.id])
+
+            # Freed capacity: retry pending tasks that had no crawler
+            with self.queue_cv:
+                self.queue_cv.notify()
+
         except Exception as e:
             # Handle task failure
             processing_time = time.time() - start_time
             
-            with self.tasks_lock:
+            with task.lock:
                 task.status = 'failed'
                 task.result = {'error': str(e)}
                 
@@ -314,7 +483,11 @@ class DistributedCrawler:
             with self.crawlers_lock:
                 if crawler.id in self.crawler_nodes:
                     self.crawler_nodes[crawler.id].current_load = max(0, self.crawler_nodes[crawler.id].current_load - 1)
-                    
+                    self._reindex_crawler(self.crawler_nodes[crawler.id])
+
+            with self.queue_cv:
+                self.queue_cv.notify()
+
             # Try to retry task
             if task.retry_count < self.max_retries:
                 self._retry_task(task)
@@ -351,7 +524,7 @@ class DistributedCrawler:
         """Handle task timeout"""
         logger.warning(f"Task {task.id} timed out")
         
-        with self.tasks_lock:
+        with task.lock:
             task.status = 'failed'
             task.result = {'error': 'Task timed out'}
             
@@ -364,12 +537,17 @@ class DistributedCrawler:
             
     def _retry_task(self, task: CrawlTask):
         """Retry a failed task"""
-        with self.tasks_lock:
+        with task.lock:
             task.retry_count += 1
             task.status = 'pending'
             task.assigned_crawler = None
-            self.task_queue.append(task)
-            
+        # SimpleQueue.put never blocks, so the failure path hands the
+        # task off without contending on queue_lock; the notify only
+        # holds the lock long enough to wake the assignment loop
+        self.retry_queue.put(task.id)
+        with self.queue_cv:
+            self.queue_cv.notify()
+
         logger.info(f"Task {task.id} retried (attempt {task.retry_count})")
         
     def _monitoring_loop(self):
@@ -395,28 +573,30 @@ class DistributedCrawler:
             for crawler_id, crawler in self.crawler_nodes.items():
                 # Check if crawler is inactive (no heartbeat for 2 minutes)
                 if current_time - crawler.last_heartbeat > 120:
+                    if crawler.status == 'active':
+                        self._active_count -= 1
                     crawler.status = 'inactive'
-                    
-            self.stats['active_crawlers'] = len([c for c in self.crawler_nodes.values() if c.status == 'active'])
             
     def _check_task_progress(self):
         """Check progress of assigned tasks"""
-        with self.tasks_lock:
-            current_time = time.time()
-            for task_id, task in self.crawl_tasks.items():
-                if task.status == 'assigned' or task.status == 'crawling':
-                    # Check if task has timed out
-                    if task.deadline and current_time > task.deadline:
-                        self._handle_task_timeout(task)
-                    # Check if task has exceeded retry limit
-                    elif task.retry_count >= self.max_retries:
-                        self._handle_task_failure(task)
+        with self.task_map_lock:
+            tasks = list(self.crawl_tasks.values())
+
+        current_time = time.time()
+        for task in tasks:
+            if task.status == 'assigned' or task.status == 'crawling':
+                # Check if task has timed out
+                if task.deadline and current_time > task.deadline:
+                    self._handle_task_timeout(task)
+                # Check if task has exceeded retry limit
+                elif task.retry_count >= self.max_retries:
+                    self._handle_task_failure(task)
                         
     def _handle_task_failure(self, task: CrawlTask):
         """Handle task failure after max retries"""
         logger.error(f"Task {task.id} failed after {self.max_retries} retries")
         
-        with self.tasks_lock:
+        with task.lock:
             task.status = 'failed'
             if not task.result:
                 task.result = {'error': 'Task failed after maximum retries'}
@@ -438,13 +618,12 @@ class DistributedCrawler:
                 if total > 0 else 0
             )
             
-            with self.crawlers_lock:
-                self.stats['active_crawlers'] = len([c for c in self.crawler_nodes.values() if c.status == 'active'])
-                
+            self.stats['active_crawlers'] = self._active_count
+
             return {
                 **self.stats,
                 'success_rate': round(success_rate, 2),
-                'queue_size': len(self.task_queue)
+                'queue_size': self._queued
             }
             
     def get_crawler_info(self, crawler_id: str) -> Optional[CrawlerNode]:
@@ -461,20 +640,31 @@ class DistributedCrawler:
         """Update crawler heartbeat"""
         with self.crawlers_lock:
             if crawler_id in self.crawler_nodes:
-                self.crawler_nodes[crawler_id].last_heartbeat = time.time()
-                self.crawler_nodes[crawler_id].status = 'active'
+                crawler = self.crawler_nodes[crawler_id]
+                crawler.last_heartbeat = time.time()
+                if crawler.status != 'active':
+                    self._active_count += 1
+                crawler.status = 'active'
                 if metrics:
-                    self.crawler_nodes[crawler_id].performance_metrics = metrics
-                    
+                    crawler.performance_metrics = metrics
+                self._reindex_crawler(crawler)
+
+        # A crawler came (back) online; give queued tasks another shot
+        with self.queue_cv:
+            self.queue_cv.notify()
+
+
     def cancel_crawl_task(self, task_id: str) -> bool:
         """Cancel a pending crawl task"""
-        with self.tasks_lock:
-            if task_id in self.crawl_tasks:
-                task = self.crawl_tasks[task_id]
+        with self.task_map_lock:
+            task = self.crawl_tasks.get(task_id)
+        if task is not None:
+            with task.lock:
                 if task.status == 'pending':
-                    # Remove from queue if present
-                    if task in self.task_queue:
-                        self.task_queue.remove(task)
+                    # Lazy deletion: the heap entry is skipped when it
+                    # reaches the top of the queue
+                    with self.queue_lock:
+                        self._cancelled_ids.add(task_id)
                     # Update status
                     task.status = 'cancelled'
                     return True
@@ -1,8 +1,13 @@
+import functools
 import hashlib
+import heapq
 import json
+import sys
 import time
 import threading
+import queue
 import ipaddress
+import numpy as np
 from typing import Dict, List, Any, Optional, Set
 from dataclasses import dataclass
 from collections import defaultdict, deque
@@ -13,16 +18,140 @@ import re
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Request-validation patterns, compiled once at import time so the hot
+# path never pays re.compile's cache lookup
+_SCANNER_UA = re.compile(r'sqlmap|nikto|masscan|nmap|dirbuster|zgrab', re.I)
+
+# All rate/window arithmetic runs on the monotonic integer clock:
+# immune to wall-clock jumps (which could silently reset rate limiters)
+# and integer compares are cheaper than float ones
+_now_ns = time.monotonic_ns
+_TRAFFIC_WINDOW_NS = 300 * 10**9   # 5 minute traffic window
+_HISTORY_CUTOFF_NS = 600 * 10**9   # traffic history retention
+_RATE_WINDOW_NS = 60 * 10**9       # default rate-limit window
+_RULE_IDLE_NS = 3600 * 10**9       # idle rule retention
+
+# Roaring bitmaps give compact O(1) membership over the IPv4 space; a
+# plain int set is the fallback and still hashes faster than strings
+try:
+    from pyroaring import BitMap
+except ImportError:
+    BitMap = set
+
+
+# Server-side token bucket: one atomic Lua call refills, drains and
+# answers, so rate limits stay consistent across every instance sharing
+# the Redis. ARGV: capacity, refill rate (tokens/sec), now (seconds),
+# key TTL (seconds).
+_TOKEN_BUCKET_LUA = """
+local bucket = redis.call('HMGET', KEYS[1], 't', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HMSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return allowed
+"""
+
+
+def _score_kernel(cpu: float, mem: float, net: float, tcr: float) -> float:
+    """Metric portion of the threat score over four plain floats"""
+    score = 0.0
+    if cpu > 90:      # Anomalous CPU usage
+        score += 0.3
+    if mem > 90:      # Anomalous memory usage
+        score += 0.2
+    if net > 80:      # Unusual network activity
+        score += 0.2
+    if tcr < 0.5:     # High failed task rate
+        score += 0.3
+    return score
+
+
+# Compile the kernel to native branches when numba is installed; the
+# pure-Python version above is the drop-in fallback
+try:
+    import numba
+    _score_kernel = numba.njit(cache=True, fastmath=True)(_score_kernel)
+except ImportError:
+    pass
+
+
+@functools.lru_cache(maxsize=65536)
+def _ip_to_int(source: str) -> Optional[int]:
+    """Parse an IPv4 string to its integer form, None for anything else
+
+    Cached so each distinct source string is parsed once, not once per
+    request.
+    """
+    try:
+        return int(ipaddress.IPv4Address(source))
+    except (ipaddress.AddressValueError, ValueError):
+        return None
+
+# Lock-free stats counters: a C-level fetch-add replaces taking an OS
+# mutex for every blocked request. pyatomix is optional; the fallback
+# leans on itertools.count, whose __next__ is a single C call that the
+# GIL never splits across threads.
+try:
+    import pyatomix
+
+    class AtomicCounter:
+        """Counter incremented with an atomic fetch-add"""
+        __slots__ = ('_value',)
+
+        def __init__(self):
+            self._value = pyatomix.AtomicInt(0)
+
+        def increment(self, n: int = 1):
+            self._value.add(n)
+
+        def get(self) -> int:
+            return self._value.load()
+
+except ImportError:
+    import itertools
+
+    class AtomicCounter:
+        """Counter incremented through itertools.count, atomic under the GIL"""
+        __slots__ = ('_counter',)
+
+        def __init__(self):
+            self._counter = itertools.count()
+
+        def increment(self, n: int = 1):
+            for _ in range(n):
+                next(self._counter)
+
+        def get(self) -> int:
+            # count exposes its next value through __reduce__ without
+            # consuming it
+            return self._counter.__reduce__()[1][0]
+
+
+@dataclass(slots=True)
 class SecurityEvent:
     event_type: str  # 'ddos', 'anomaly', 'compromise', 'rate_limit'
     source: str  # IP address or node ID
-    timestamp: float
+    timestamp: float  # wall-clock, for logging/display
     severity: str  # 'low', 'medium', 'high', 'critical'
     details: Dict[str, Any]
     handled: bool = False
+    timestamp_ns: int = 0  # monotonic, for internal ordering
 
-@dataclass
+@dataclass(slots=True)
 class NodeSecurityStatus:
     node_id: str
     status: str  # 'trusted', 'suspicious', 'compromised', 'blacklisted'
@@ -30,44 +159,149 @@ class NodeSecurityStatus:
     last_updated: float
     incidents: List[str]  # List of incident IDs
 
-@dataclass
+class RingTimestamps:
+    """Bounded ring of float64 timestamps for one traffic source
+
+    A deque of boxed Python floats costs ~28 bytes per entry and is
+    iterated at interpreter speed; a float64 ring stores 8 bytes per
+    slot and evicts with one binary search. The buffer starts small
+    and doubles toward the capacity cap as entries arrive, so a
+    source-rotating flood paying one request per spoofed source does
+    not preallocate the worst-case ring for each of them.
+    """
+    __slots__ = ('buf', 'head', 'count', 'capacity')
+
+    _INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buf = np.empty(min(self._INITIAL_CAPACITY, capacity), dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    def push(self, timestamp: float):
+        """Append a timestamp, overwriting the oldest slot at the cap"""
+        size = len(self.buf)
+        if self.count == size and size < self.capacity:
+            self._grow()
+            size = len(self.buf)
+        self.buf[(self.head + self.count) % size] = timestamp
+        if self.count == size:
+            self.head = (self.head + 1) % size
+        else:
+            self.count += 1
+
+    def _grow(self):
+        """Double the buffer toward the cap, compacting live entries"""
+        grown = np.empty(min(len(self.buf) * 2, self.capacity), dtype=np.float64)
+        grown[:self.count] = self.unrolled()
+        self.buf = grown
+        self.head = 0
+
+    def unrolled(self) -> np.ndarray:
+        """Return the live entries as one ordered contiguous array"""
+        capacity = len(self.buf)
+        end = self.head + self.count
+        if end <= capacity:
+            return self.buf[self.head:end]
+        return np.concatenate((self.buf[self.head:], self.buf[:end - capacity]))
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """Drop entries before cutoff in O(log N), return remaining count"""
+        dropped = int(np.searchsorted(self.unrolled(), cutoff))
+        self.head = (self.head + dropped) % len(self.buf)
+        self.count -= dropped
+        return self.count
+
+
+@dataclass(slots=True)
 class RateLimitRule:
     identifier: str  # IP, node_id, or other identifier
     limit: int  # Number of requests allowed
-    window: int  # Time window in seconds
+    window: int  # Time window in nanoseconds (monotonic clock)
     current_count: int = 0
-    window_start: float = 0.0
+    window_start: int = 0
 
 class AttackResilienceManager:
-    def __init__(self, ddos_threshold: int = 1000, anomaly_threshold: float = 2.0):
+    # Power-of-two stripe count so shard selection is a bitwise mask
+    _NUM_SHARDS = 16
+    _SHARD_MASK = _NUM_SHARDS - 1
+
+    def __init__(self, ddos_threshold: int = 1000, anomaly_threshold: float = 2.0,
+                 redis_client=None):
         """Initialize attack resilience manager"""
         self.ddos_threshold = ddos_threshold
         self.anomaly_threshold = anomaly_threshold
+        # With a shared Redis, rate limiting moves server-side and is
+        # coordinated across all instances; without one, the striped
+        # in-process rules below still apply per instance
+        self._rl_script = None
+        if redis_client is not None:
+            self._rl_script = redis_client.register_script(_TOKEN_BUCKET_LUA)
         self.security_events = deque(maxlen=10000)  # Keep last 10k events
-        self.node_security_status = {}  # node_id -> NodeSecurityStatus
-        self.rate_limit_rules = {}  # identifier -> RateLimitRule
-        self.blacklisted_ips = set()  # Set of blacklisted IP addresses
+        # Lock-striped state: 16 independent shards each guarded by their
+        # own lock, selected by hash, so concurrent clients only contend
+        # when they land on the same stripe
+        self.node_shards = [{} for _ in range(self._NUM_SHARDS)]  # node_id -> NodeSecurityStatus
+        self.node_locks = [threading.Lock() for _ in range(self._NUM_SHARDS)]
+        self.rate_limit_shards = [{} for _ in range(self._NUM_SHARDS)]  # identifier -> RateLimitRule
+        self.rate_limit_locks = [threading.Lock() for _ in range(self._NUM_SHARDS)]
+        # IPv4 blacklist entries live in an integer bitmap; the string
+        # set only holds sources that don't parse as IPv4 (e.g. IPv6)
+        self._blacklist_v4 = BitMap()
+        self.blacklisted_ips = set()  # Non-IPv4 blacklisted sources
         self.whitelisted_ips = set()  # Set of trusted IP addresses
         self.is_running = False
         self.monitoring_thread = None
         self.incident_response_thread = None
-        self.traffic_history = defaultdict(deque)  # source -> deque of timestamps
+        # Token bucket per source: [tokens, last_refill]. Two floats
+        # replace an unbounded deque of per-request timestamps, and the
+        # refill is O(1) arithmetic instead of a popleft loop.
+        self.buckets = {}  # source -> [tokens, last_refill]
+        self.bucket_capacity = float(ddos_threshold)
+        self.bucket_rate = ddos_threshold / _TRAFFIC_WINDOW_NS  # sustained tokens/ns
+        # Per-source timestamp rings feed the anomaly scan; they grow
+        # on demand up to 2x the DDoS threshold, past which the bucket
+        # blacklists the source anyway
+        self.ring_capacity = ddos_threshold * 2
+        self.traffic_history = {}  # source -> RingTimestamps
+        # Structure-of-arrays mirror of per-source request counts: the
+        # anomaly scan reduces one int32 array with NumPy instead of
+        # looping over every source in the interpreter
+        self._source_index = {}  # source -> slot in _counts
+        self._slot_source = []   # slot -> source
+        self._free_slots = []
+        self._counts = np.zeros(64, dtype=np.int32)  # grown by doubling
+        # Min-heap of (oldest_timestamp, source): cleanup pops only the
+        # sources that actually have something to expire
+        self._expire_heap = []
+        # Rings, the slot table and the expire heap are mutated by
+        # every request thread and by the cleanup sweep; unlike the
+        # striped shards they share one counts array and one heap, so
+        # a single lock guards them as a unit
+        self._traffic_lock = threading.Lock()
         self.request_counters = defaultdict(int)  # endpoint -> count
         self.isolation_zones = {}  # zone_id -> list of isolated nodes
         
-        # Performance metrics
+        # Performance metrics: lock-free counters, no stats mutex
         self.stats = {
-            'total_events': 0,
-            'handled_events': 0,
-            'blocked_requests': 0,
-            'isolated_nodes': 0
+            'total_events': AtomicCounter(),
+            'handled_events': AtomicCounter(),
+            'blocked_requests': AtomicCounter(),
+            'isolated_nodes': AtomicCounter()
         }
-        
-        # Locks for thread safety
+
+        # Lock for the shared event history
         self.events_lock = threading.Lock()
-        self.nodes_lock = threading.Lock()
-        self.rate_limit_lock = threading.Lock()
-        self.stats_lock = threading.Lock()
+
+        # Unhandled events also go on a queue so the responder drains
+        # O(pending) instead of sweeping the whole history deque
+        self._pending_events = queue.SimpleQueue()
+
+        # High-severity events wake the loops immediately instead of
+        # waiting out a blind sleep
+        self._monitor_wake = threading.Event()
+        self._responder_wake = threading.Event()
         
     def start_monitoring(self):
         """Start security monitoring"""
@@ -89,7 +323,12 @@ class AttackResilienceManager:
     def stop_monitoring(self):
         """Stop security monitoring"""
         self.is_running = False
-        
+
+        # Wake both loops so they notice the stop without waiting out
+        # their current backoff
+        self._monitor_wake.set()
+        self._responder_wake.set()
+
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5)
             
@@ -100,53 +339,124 @@ class AttackResilienceManager:
         
     def log_request(self, source: str, endpoint: str = "/", user_agent: str = ""):
         """Log incoming request for security monitoring"""
-        current_time = time.time()
-        
-        # Check if source is blacklisted
-        if source in self.blacklisted_ips:
-            with self.stats_lock:
-                self.stats['blocked_requests'] += 1
+        current_time = _now_ns()
+
+        # Intern the source: repeated requests from the same IP then
+        # hit every dict with pointer-equal key comparisons
+        source = sys.intern(source)
+
+        # Check if source is blacklisted (integer membership for IPv4)
+        ip_int = _ip_to_int(source)
+        if (ip_int in self._blacklist_v4 if ip_int is not None
+                else source in self.blacklisted_ips):
+            self.stats['blocked_requests'].increment()
             return False  # Block request
             
-        # Update traffic history
-        self.traffic_history[source].append(current_time)
-        
-        # Keep only recent traffic (last 5 minutes)
-        while (self.traffic_history[source] and 
-               current_time - self.traffic_history[source][0] > 300):
-            self.traffic_history[source].popleft()
-            
+        # Refill and drain the source's token bucket; an empty bucket
+        # means the source exceeded the sustained DDoS rate
+        bucket = self.buckets.get(source)
+        if bucket is None:
+            self.buckets[source] = [self.bucket_capacity - 1.0, current_time]
+        else:
+            elapsed = current_time - bucket[1]
+            bucket[0] = min(self.bucket_capacity, bucket[0] + elapsed * self.bucket_rate)
+            bucket[1] = current_time
+            if bucket[0] < 1.0:
+                self._log_security_event('ddos', source, 'high', {
+                    'capacity': self.ddos_threshold,
+                    'refill_rate': self.bucket_rate,
+                    'time_window': 300
+                })
+                self._blacklist_source(source)
+                return False  # Bucket exhausted
+            bucket[0] -= 1.0
+
+        # Flag known scanner user agents
+        if user_agent and _SCANNER_UA.search(user_agent):
+            self._log_security_event('anomaly', source, 'medium', {
+                'user_agent': user_agent,
+                'endpoint': endpoint
+            })
+
+        with self._traffic_lock:
+            ring = self.traffic_history.get(source)
+            if ring is None:
+                ring = self.traffic_history[source] = RingTimestamps(self.ring_capacity)
+                slot = self._alloc_slot(source)
+                heapq.heappush(self._expire_heap, (current_time, source))
+            else:
+                slot = self._source_index[source]
+            ring.push(current_time)
+            # Clamp at ring capacity: a full ring overwrites its oldest slot
+            if self._counts[slot] < self.ring_capacity:
+                self._counts[slot] += 1
+
         # Update request counters
         self.request_counters[endpoint] += 1
-        
-        # Check for DDoS attack
-        if len(self.traffic_history[source]) > self.ddos_threshold:
-            self._log_security_event('ddos', source, 'high', {
-                'request_count': len(self.traffic_history[source]),
-                'time_window': 300
-            })
-            self._blacklist_source(source)
-            
+
         # Check rate limits
         if not self._check_rate_limit(source):
             return False  # Rate limit exceeded
             
         return True  # Request allowed
         
+    def _alloc_slot(self, source: str) -> int:
+        """Assign a counts-array slot to a new source, growing as needed
+
+        Caller holds _traffic_lock: the doubling of _counts is a
+        replace-the-array operation that must not race a writer.
+        """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_source[slot] = source
+        else:
+            slot = len(self._slot_source)
+            self._slot_source.append(source)
+            if slot == len(self._counts):
+                grown = np.zeros(len(self._counts) * 2, dtype=np.int32)
+                grown[:slot] = self._counts
+                self._counts = grown
+        self._counts[slot] = 0
+        self._source_index[source] = slot
+        return slot
+
     def _check_rate_limit(self, identifier: str) -> bool:
         """Check if identifier has exceeded rate limit"""
-        current_time = time.time()
-        
-        with self.rate_limit_lock:
-            if identifier not in self.rate_limit_rules:
+        current_time = _now_ns()
+        identifier = sys.intern(identifier)
+
+        # Cluster-wide bucket when Redis is configured; wall-clock time
+        # because instances don't share a monotonic clock
+        if self._rl_script is not None:
+            try:
+                allowed = self._rl_script(
+                    keys=[f"rl:{identifier}"],
+                    args=[100, 100 / 60.0, time.time(), 120]
+                )
+                if not allowed:
+                    self._log_security_event('rate_limit', identifier, 'medium', {
+                        'limit': 100,
+                        'window': 60,
+                        'scope': 'cluster'
+                    })
+                    return False
+                return True
+            except Exception as e:
+                logger.error(f"Redis rate limit error, falling back to local: {e}")
+
+        shard = hash(identifier) & self._SHARD_MASK
+
+        with self.rate_limit_locks[shard]:
+            rules = self.rate_limit_shards[shard]
+            if identifier not in rules:
                 # Create new rate limit rule
-                self.rate_limit_rules[identifier] = RateLimitRule(
+                rules[identifier] = RateLimitRule(
                     identifier=identifier,
                     limit=100,  # Default 100 requests per minute
-                    window=60
+                    window=_RATE_WINDOW_NS
                 )
-                
-            rule = self.rate_limit_rules[identifier]
+
+            rule = rules[identifier]
             
             # Reset window if needed
             if current_time - rule.window_start > rule.window:
@@ -169,68 +479,65 @@ class AttackResilienceManager:
         
     def check_node_security(self, node_id: str, metrics: Dict[str, Any]) -> bool:
         """Check if node behavior is suspicious"""
-        threat_score = self._calculate_threat_score(node_id, metrics)
-        
-        with self.nodes_lock:
-            # Update node security status
-            if node_id not in self.node_security_status:
-                self.node_security_status[node_id] = NodeSecurityStatus(
+        metric_score = self._metric_threat_score(metrics)
+        node_id = sys.intern(node_id)
+        shard = hash(node_id) & self._SHARD_MASK
+
+        # One lock acquisition and one record lookup cover the history
+        # bump, the score update and the status transition
+        with self.node_locks[shard]:
+            nodes = self.node_shards[shard]
+            record = nodes.get(node_id)
+
+            history = 0.0
+            if record is not None:
+                if record.status == 'suspicious':
+                    history = 0.2
+                elif record.status == 'compromised':
+                    history = 0.5
+            threat_score = min(1.0, metric_score + history)  # Cap at 1.0
+
+            if record is None:
+                record = NodeSecurityStatus(
                     node_id=node_id,
                     status='trusted',
                     threat_score=threat_score,
                     last_updated=time.time(),
                     incidents=[]
                 )
+                nodes[node_id] = record
             else:
-                self.node_security_status[node_id].threat_score = threat_score
-                self.node_security_status[node_id].last_updated = time.time()
-                
+                record.threat_score = threat_score
+                record.last_updated = time.time()
+
             # Check if node should be isolated
             if threat_score > 0.8:
-                self.node_security_status[node_id].status = 'compromised'
-                self._isolate_node(node_id)
-                return False  # Node is compromised
+                record.status = 'compromised'
             elif threat_score > 0.5:
-                self.node_security_status[node_id].status = 'suspicious'
+                record.status = 'suspicious'
                 return True  # Node is suspicious but allowed
             else:
-                self.node_security_status[node_id].status = 'trusted'
+                record.status = 'trusted'
                 return True  # Node is trusted
+
+        # Isolate outside the stripe lock; _isolate_node re-acquires it
+        self._isolate_node(node_id)
+        return False  # Node is compromised
                 
-    def _calculate_threat_score(self, node_id: str, metrics: Dict[str, Any]) -> float:
-        """Calculate threat score for a node based on metrics"""
-        score = 0.0
-        
-        # Check for anomalous CPU usage
-        cpu_usage = metrics.get('cpu_usage', 0)
-        if cpu_usage > 90:
-            score += 0.3
-            
-        # Check for anomalous memory usage
-        memory_usage = metrics.get('memory_usage', 0)
-        if memory_usage > 90:
-            score += 0.2
-            
-        # Check for unusual network activity
-        network_usage = metrics.get('network_usage', 0)
-        if network_usage > 80:
-            score += 0.2
-            
-        # Check for failed task rate
-        task_completion_rate = metrics.get('task_completion_rate', 1.0)
-        if task_completion_rate < 0.5:
-            score += 0.3
-            
-        # Check node security history
-        with self.nodes_lock:
-            if node_id in self.node_security_status:
-                status = self.node_security_status[node_id]
-                if status.status == 'suspicious':
-                    score += 0.2
-                elif status.status == 'compromised':
-                    score += 0.5
-                    
-        return min(1.0, score)  # Cap at 1.0
+    def _metric_threat_score(self, metrics: Dict[str, Any]) -> float:
+        """Score the metrics-based portion of a node's threat level
+
+        The dict lookups stay here; the branch-and-add arithmetic lives
+        in _score_kernel, which runs as native code when numba is
+        available. The history-based bump is applied by the caller,
+        which already holds the node's stripe lock and record.
+        """
+        return _score_kernel(
+            float(metrics.get('cpu_usage', 0)),
+            float(metrics.get('memory_usage', 0)),
+            float(metrics.get('network_usage', 0)),
+            float(metrics.get('task_completion_rate', 1.0))
+        )
         
     def _log_security_event(self, event_type: str, source: str, severity: str, details: Dict[str, Any]):
         """Log a security event"""
@@ -239,18 +546,29 @@ class AttackResilienceManager:
             source=source,
             timestamp=time.time(),
             severity=severity,
-            details=details
+            details=details,
+            timestamp_ns=_now_ns()
         )
         
         with self.events_lock:
             self.security_events.append(event)
-            self.stats['total_events'] += 1
+        self._pending_events.put(event)
+        self.stats['total_events'].increment()
+
+        # Urgent events cut through the loops' idle backoff
+        if severity in ('high', 'critical'):
+            self._monitor_wake.set()
+            self._responder_wake.set()
             
         logger.info(f"Security event logged: {event_type} from {source} (severity: {severity})")
         
     def _blacklist_source(self, source: str):
         """Blacklist a source IP address"""
-        self.blacklisted_ips.add(source)
+        ip_int = _ip_to_int(source)
+        if ip_int is not None:
+            self._blacklist_v4.add(ip_int)
+        else:
+            self.blacklisted_ips.add(source)
         
         self._log_security_event('blacklist', source, 'high', {
             'action': 'added_to_blacklist'
@@ -263,61 +581,72 @@ class AttackResilienceManager:
         # In a real implementation, this would send isolation commands to the network
         # For now, we'll just log the isolation
         
-        with self.nodes_lock:
-            if node_id in self.node_security_status:
-                self.node_security_status[node_id].status = 'compromised'
+        shard = hash(node_id) & self._SHARD_MASK
+        with self.node_locks[shard]:
+            if node_id in self.node_shards[shard]:
+                self.node_shards[shard][node_id].status = 'compromised'
                 
         self._log_security_event('isolation', node_id, 'critical', {
             'action': 'node_isolated'
         })
         
-        with self.stats_lock:
-            self.stats['isolated_nodes'] += 1
+        self.stats['isolated_nodes'].increment()
             
         logger.critical(f"Node {node_id} isolated due to security threat")
         
     def _monitoring_loop(self):
         """Main monitoring loop"""
+        backoff = 10
         while self.is_running:
             try:
-                current_time = time.time()
-                
+                current_time = _now_ns()
+
                 # Check for anomalies in traffic patterns
                 self._detect_traffic_anomalies(current_time)
-                
+
                 # Check for anomalies in node behavior
                 self._detect_node_anomalies(current_time)
-                
+
                 # Clean up old data
                 self._cleanup_old_data(current_time)
-                
-                time.sleep(10)  # Check every 10 seconds
-                
+
+                # Busy periods scan every 10s; idle ones back off, and
+                # any high-severity event wakes the loop immediately
+                backoff = 10 if self.traffic_history else min(backoff * 2, 120)
+                self._monitor_wake.wait(timeout=backoff)
+                self._monitor_wake.clear()
+
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 time.sleep(5)
                 
     def _detect_traffic_anomalies(self, current_time: float):
         """Detect anomalies in traffic patterns"""
-        # Calculate average requests per second
-        total_requests = sum(len(timestamps) for timestamps in self.traffic_history.values())
+        # Copy under the lock so the scan works on a stable snapshot
+        # while request threads keep mutating the live array
+        with self._traffic_lock:
+            counts = self._counts[:len(self._slot_source)].copy()
+            sources = list(self._slot_source)
+        if counts.size == 0:
+            return
+
+        # Two vectorized reductions replace the per-source Python loop;
+        # sources with fewer than 10 requests are too thin to analyze
+        total_requests = int(counts.sum())
         avg_requests_per_second = total_requests / 300  # 5 minutes window
-        
-        # Check each source for anomalous behavior
-        for source, timestamps in self.traffic_history.items():
-            if len(timestamps) < 10:  # Need at least 10 requests for analysis
-                continue
-                
-            # Calculate requests per second for this source
-            source_requests_per_second = len(timestamps) / 300
-            
-            # Check if source is significantly above average
-            if source_requests_per_second > avg_requests_per_second * self.anomaly_threshold:
-                self._log_security_event('anomaly', source, 'medium', {
-                    'avg_rps': avg_requests_per_second,
-                    'source_rps': source_requests_per_second,
-                    'threshold': self.anomaly_threshold
-                })
+        rps = counts / 300.0
+        anomalous = np.flatnonzero(
+            (counts >= 10) &
+            (rps > avg_requests_per_second * self.anomaly_threshold)
+        )
+
+        # Only the (typically tiny) anomalous set is iterated
+        for slot in anomalous:
+            self._log_security_event('anomaly', sources[slot], 'medium', {
+                'avg_rps': avg_requests_per_second,
+                'source_rps': float(rps[slot]),
+                'threshold': self.anomaly_threshold
+            })
                 
     def _detect_node_anomalies(self, current_time: float):
         """Detect anomalies in node behavior"""
@@ -327,54 +656,80 @@ class AttackResilienceManager:
         
     def _cleanup_old_data(self, current_time: float):
         """Clean up old security data"""
-        # Clean up old traffic history (older than 10 minutes)
-        cutoff_time = current_time - 600
-        sources_to_remove = []
-        
-        for source, timestamps in self.traffic_history.items():
-            while timestamps and timestamps[0] < cutoff_time:
-                timestamps.popleft()
-                
-            if not timestamps:
-                sources_to_remove.append(source)
-                
-        for source in sources_to_remove:
-            del self.traffic_history[source]
+        cutoff_time = current_time - _HISTORY_CUTOFF_NS
+
+        # Drop buckets idle for 10+ minutes; they would refill to
+        # capacity on the next request anyway
+        stale_buckets = [source for source, bucket in self.buckets.items()
+                         if bucket[1] < cutoff_time]
+        for source in stale_buckets:
+            del self.buckets[source]
+
+        # Clean up old traffic history (older than 10 minutes). The heap
+        # is keyed by each source's oldest timestamp, so only sources
+        # with something to expire are touched — O(k log N), not
+        # O(all sources). Each popped ring is evicted with one binary
+        # search, its count resynced, and re-queued under its new oldest
+        # entry (or retired when empty). The whole walk runs under
+        # _traffic_lock: heapq on a shared list is not thread-safe, and
+        # a siftup racing log_request's push would silently break the
+        # heap invariant.
+        with self._traffic_lock:
+            heap = self._expire_heap
+            while heap and heap[0][0] < cutoff_time:
+                _, source = heapq.heappop(heap)
+                ring = self.traffic_history.get(source)
+                if ring is None:
+                    continue
+                remaining = ring.evict_older_than(cutoff_time)
+                self._counts[self._source_index[source]] = remaining
+                if remaining == 0:
+                    del self.traffic_history[source]
+                    slot = self._source_index.pop(source)
+                    self._slot_source[slot] = None
+                    self._free_slots.append(slot)
+                else:
+                    heapq.heappush(heap, (float(ring.unrolled()[0]), source))
             
-        # Clean up old rate limit rules (older than 1 hour with no activity)
-        with self.rate_limit_lock:
-            rules_to_remove = []
-            for identifier, rule in self.rate_limit_rules.items():
-                if current_time - rule.window_start > 3600 and rule.current_count == 0:
-                    rules_to_remove.append(identifier)
-                    
-            for identifier in rules_to_remove:
-                del self.rate_limit_rules[identifier]
+        # Clean up old rate limit rules (older than 1 hour with no
+        # activity), one stripe at a time so no lock is held for long
+        for lock, rules in zip(self.rate_limit_locks, self.rate_limit_shards):
+            with lock:
+                rules_to_remove = [
+                    identifier for identifier, rule in rules.items()
+                    if current_time - rule.window_start > _RULE_IDLE_NS and rule.current_count == 0
+                ]
+                for identifier in rules_to_remove:
+                    del rules[identifier]
                 
     def _incident_response_loop(self):
         """Handle security incidents"""
+        backoff = 30
         while self.is_running:
             try:
                 # Process unhandled security events
                 unhandled_events = self._get_unhandled_events()
-                
+
                 for event in unhandled_events:
                     self._handle_security_event(event)
-                    
-                time.sleep(30)  # Check every 30 seconds
-                
+
+                # Quiet stretches back off; urgent events wake us early
+                backoff = 30 if unhandled_events else min(backoff * 2, 300)
+                self._responder_wake.wait(timeout=backoff)
+                self._responder_wake.clear()
+
             except Exception as e:
                 logger.error(f"Error in incident response loop: {e}")
                 time.sleep(5)
                 
     def _get_unhandled_events(self) -> List[SecurityEvent]:
-        """Get list of unhandled security events"""
+        """Drain the pending-event queue"""
         unhandled = []
-        with self.events_lock:
-            for event in self.security_events:
-                if not event.handled:
-                    unhandled.append(event)
-        return unhandled
+        while True:
+            try:
+                unhandled.append(self._pending_events.get_nowait())
+            except queue.Empty:
+                return unhandled
         
     def _handle_security_event(self, event: SecurityEvent):
         """Handle a security event"""
@@ -390,9 +745,8 @@ class AttackResilienceManager:
                 
             # Mark event as handled
             event.handled = True
-            
-            with self.stats_lock:
-                self.stats['handled_events'] += 1
+
+            self.stats['handled_events'].increment()
                 
         except Exception as e:
             logger.error(f"Error handling security event: {e}")
@@ -419,24 +773,27 @@ class AttackResilienceManager:
         
     def get_security_stats(self) -> Dict[str, Any]:
         """Get security statistics"""
-        with self.stats_lock:
-            total = self.stats['total_events']
-            handled_rate = (
-                self.stats['handled_events'] / total * 100
-                if total > 0 else 0
-            )
-            
-            return {
-                **self.stats,
-                'handled_rate': round(handled_rate, 2),
-                'blacklisted_count': len(self.blacklisted_ips),
-                'active_threats': len([e for e in self.security_events if not e.handled])
-            }
+        # Snapshot without a lock: the fields may be a few increments
+        # apart, which is fine for a stats endpoint
+        snapshot = {name: counter.get() for name, counter in self.stats.items()}
+        total = snapshot['total_events']
+        handled_rate = (
+            snapshot['handled_events'] / total * 100
+            if total > 0 else 0
+        )
+
+        return {
+            **snapshot,
+            'handled_rate': round(handled_rate, 2),
+            'blacklisted_count': len(self._blacklist_v4) + len(self.blacklisted_ips),
+            'active_threats': len([e for e in self.security_events if not e.handled])
+        }
             
     def get_node_security_status(self, node_id: str) -> Optional[NodeSecurityStatus]:
         """Get security status for a specific node"""
-        with self.nodes_lock:
-            return self.node_security_status.get(node_id)
+        shard = hash(node_id) & self._SHARD_MASK
+        with self.node_locks[shard]:
+            return self.node_shards[shard].get(node_id)
             
     def get_recent_events(self, limit: int = 50) -> List[SecurityEvent]:
         """Get recent security events"""
@@ -446,8 +803,11 @@ class AttackResilienceManager:
     def add_to_whitelist(self, source: str):
         """Add source to whitelist"""
         self.whitelisted_ips.add(source)
-        if source in self.blacklisted_ips:
-            self.blacklisted_ips.remove(source)
+        ip_int = _ip_to_int(source)
+        if ip_int is not None:
+            self._blacklist_v4.discard(ip_int)
+        else:
+            self.blacklisted_ips.discard(source)
             
         logger.info(f"Source {source} added to whitelist")
         
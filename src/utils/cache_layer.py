@@ -1,38 +1,151 @@
 import redis
-import json
+import orjson
 import hashlib
+import io
+import pickle
 import time
 from functools import wraps
 from typing import Any, Optional, Callable
+from .attack_resilience import AtomicCounter
+
+# Cache keys are not security material, so the much faster xxh3 is
+# preferred when available; blake2b still beats md5 as the fallback
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# blake3's SIMD tree hashing is the fastest option for multi-KB key
+# payloads (e.g. array arguments to a cached inference function)
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Claim marker for in-flight cache fills; never valid JSON or pickle,
+# so it can't collide with a real serialized value
+_PENDING = b'\x00PENDING'
+
+
+# Builtins an unpickler may name: containers and scalars only. Anything
+# callable with side effects (eval, exec, getattr, __import__) would let
+# a REDUCE opcode in a crafted payload execute arbitrary code.
+_SAFE_BUILTINS = frozenset({
+    'bool', 'bytearray', 'bytes', 'complex', 'dict', 'float',
+    'frozenset', 'int', 'list', 'set', 'str', 'tuple',
+})
+
+
+class _AllowlistUnpickler(pickle.Unpickler):
+    """Unpickler that refuses classes outside an allowlist
+
+    Binary cache entries are internal, but Redis contents should still
+    not be able to name arbitrary constructors.
+    """
+
+    def __init__(self, data: bytes, allowed):
+        super().__init__(io.BytesIO(data))
+        self._allowed = allowed
+
+    def find_class(self, module, name):
+        if ((module == 'builtins' and name in _SAFE_BUILTINS)
+                or (module, name) in self._allowed):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"class {module}.{name} is not allowed")
+
+# Single round-trip get-or-claim: returns the cached value, or claims
+# the key with a short-lived PENDING marker so only one caller computes
+_GET_OR_CLAIM_LUA = """
+local v = redis.call('GET', KEYS[1])
+if v then return v end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2], 'NX')
+return nil
+"""
 
 class CacheLayer:
-    def __init__(self, host='localhost', port=6379, db=0, default_ttl=3600):
-        """Initialize cache layer with Redis connection"""
-        self.redis_client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+    # One connection pool per Redis endpoint, shared across instances,
+    # so threads get parallel connections instead of serializing on one
+    # socket
+    _pools = {}
+
+    @classmethod
+    def _get_pool(cls, host, port, db):
+        endpoint = (host, port, db)
+        if endpoint not in cls._pools:
+            cls._pools[endpoint] = redis.ConnectionPool(
+                host=host, port=port, db=db, max_connections=64)
+        return cls._pools[endpoint]
+
+    def __init__(self, host='localhost', port=6379, db=0, default_ttl=3600,
+                 key_salt=None, binary=False, binary_allowlist=frozenset()):
+        """Initialize cache layer with Redis connection
+
+        key_salt: optional 32-byte key for blake3 keyed hashing, which
+        keeps cache keys from colliding across tenants sharing a Redis.
+        binary: serialize with pickle protocol 5 instead of JSON — for
+        trusted internal callers only; supports types JSON can't and
+        zero-copies buffer-backed objects. binary_allowlist: extra
+        (module, name) pairs the unpickler may instantiate (container
+        and scalar builtins are always allowed).
+        """
+        self.key_salt = key_salt
+        self.binary = binary
+        self.binary_allowlist = binary_allowlist
+        # decode_responses stays off: orjson parses the raw bytes
+        # directly, so there is no point paying for a utf-8 decode first
+        self.redis_client = redis.Redis(connection_pool=self._get_pool(host, port, db))
+        self._get_or_claim = self.redis_client.register_script(_GET_OR_CLAIM_LUA)
         self.default_ttl = default_ttl
+        # Plain int increments are not thread-safe; atomic counters make
+        # concurrent cache calls safe without a lock on every hit
         self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'deletes': 0
+            'hits': AtomicCounter(),
+            'misses': AtomicCounter(),
+            'sets': AtomicCounter(),
+            'deletes': AtomicCounter()
         }
         
     def generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate cache key from function arguments"""
-        # Create a hash of the arguments to ensure consistent key generation
-        key_data = str(args) + str(sorted(kwargs.items()))
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        return f"{prefix}:{key_hash}"
+        # Binary serialization skips the large repr strings str() built
+        # for every argument while staying consistent per call signature
+        key_data = pickle.dumps((args, sorted(kwargs.items())), protocol=5)
+        # Multi-KB payloads go through blake3, whose parallel tree walk
+        # beats a scalar hash loop; small ones aren't worth its setup
+        if blake3 is not None and len(key_data) >= 4096:
+            if self.key_salt is not None:
+                hasher = blake3.blake3(key=self.key_salt)
+            else:
+                hasher = blake3.blake3()
+            hasher.update(key_data)
+            return f"{prefix}:{hasher.hexdigest(length=16)}"
+        if xxhash is not None:
+            return f"{prefix}:{xxhash.xxh3_64_hexdigest(key_data)}"
+        return f"{prefix}:{hashlib.blake2b(key_data, digest_size=8).hexdigest()}"
         
+    def _serialize(self, value: Any) -> bytes:
+        """Encode a value for storage"""
+        if self.binary:
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        # orjson handles datetime/UUID/numpy natively, so the default
+        # hook only fires for genuinely exotic types
+        return orjson.dumps(value, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def _deserialize(self, raw: bytes) -> Any:
+        """Decode a stored value"""
+        if self.binary:
+            return _AllowlistUnpickler(raw, self.binary_allowlist).load()
+        return orjson.loads(raw)
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
             value = self.redis_client.get(key)
-            if value:
-                self.stats['hits'] += 1
-                return json.loads(value)
+            if value and value != _PENDING:
+                self.stats['hits'].increment()
+                return self._deserialize(value)
             else:
-                self.stats['misses'] += 1
+                self.stats['misses'].increment()
                 return None
         except Exception as e:
             print(f"Cache get error: {e}")
@@ -41,61 +154,105 @@ class CacheLayer:
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set value in cache"""
         try:
-            serialized_value = json.dumps(value, default=str)
+            serialized_value = self._serialize(value)
             ttl = ttl or self.default_ttl
             result = self.redis_client.setex(key, ttl, serialized_value)
             if result:
-                self.stats['sets'] += 1
+                self.stats['sets'].increment()
             return result
         except Exception as e:
             print(f"Cache set error: {e}")
             return False
             
+    def mget(self, keys: list) -> list:
+        """Get many values from cache in one round-trip"""
+        try:
+            values = self.redis_client.mget(keys)
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+            return [None] * len(keys)
+
+        results = []
+        for value in values:
+            if value and value != _PENDING:
+                self.stats['hits'].increment()
+                results.append(self._deserialize(value))
+            else:
+                self.stats['misses'].increment()
+                results.append(None)
+        return results
+
+    def mset(self, items: dict, ttl: Optional[int] = None) -> bool:
+        """Set many values in one pipelined round-trip"""
+        try:
+            ttl = ttl or self.default_ttl
+            # transaction=False: plain pipelining, no MULTI/EXEC overhead
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, self._serialize(value))
+            pipe.execute()
+            self.stats['sets'].increment(len(items))
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """Delete value from cache"""
         try:
             result = self.redis_client.delete(key)
             if result:
-                self.stats['deletes'] += 1
+                self.stats['deletes'].increment()
             return result > 0
         except Exception as e:
             print(f"Cache delete error: {e}")
             return False
             
-    def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching a pattern"""
+    def invalidate_pattern(self, pattern: str, batch: int = 500) -> int:
+        """Invalidate all keys matching a pattern without blocking Redis
+
+        KEYS walks the whole keyspace in one blocking call; SCAN visits
+        it in bounded cursor steps, and UNLINK reclaims memory on a
+        Redis background thread instead of freeing inline.
+        """
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                result = self.redis_client.delete(*keys)
-                self.stats['deletes'] += result
-                return result
-            return 0
+            total = 0
+            pipe = self.redis_client.pipeline(transaction=False)
+            pending = 0
+            for key in self.redis_client.scan_iter(match=pattern, count=batch):
+                pipe.unlink(key)
+                pending += 1
+                if pending >= batch:
+                    total += sum(pipe.execute())
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pending = 0
+            if pending:
+                total += sum(pipe.execute())
+            self.stats['deletes'].increment(total)
+            return total
         except Exception as e:
             print(f"Cache pattern invalidation error: {e}")
             return 0
             
     def get_stats(self) -> dict:
         """Get cache statistics"""
-        total_requests = self.stats['hits'] + self.stats['misses']
-        hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
-        
+        snapshot = {name: counter.get() for name, counter in self.stats.items()}
+        total_requests = snapshot['hits'] + snapshot['misses']
+        hit_rate = (snapshot['hits'] / total_requests * 100) if total_requests > 0 else 0
+
         return {
-            'hits': self.stats['hits'],
-            'misses': self.stats['misses'],
-            'sets': self.stats['sets'],
-            'deletes': self.stats['deletes'],
+            **snapshot,
             'hit_rate': round(hit_rate, 2),
             'total_requests': total_requests
         }
-        
+
     def clear_stats(self):
         """Clear cache statistics"""
         self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'deletes': 0
+            'hits': AtomicCounter(),
+            'misses': AtomicCounter(),
+            'sets': AtomicCounter(),
+            'deletes': AtomicCounter()
         }
         
     def cache(self, prefix: str, ttl: Optional[int] = None):
@@ -105,22 +262,60 @@ class CacheLayer:
             def wrapper(*args, **kwargs):
                 # Generate cache key
                 key = self.generate_key(prefix, *args, **kwargs)
-                
-                # Try to get from cache
-                cached_result = self.get(key)
-                if cached_result is not None:
-                    return cached_result
-                    
-                # If not in cache, call function
+
+                # One round-trip: either the value comes back, or the
+                # key is claimed for this caller to fill
+                try:
+                    raw = self._get_or_claim(keys=[key], args=[_PENDING, 5000])
+                except Exception as e:
+                    print(f"Cache get error: {e}")
+                    raw = None
+
+                if raw is not None and raw != _PENDING:
+                    self.stats['hits'].increment()
+                    return self._deserialize(raw)
+                self.stats['misses'].increment()
+
                 result = func(*args, **kwargs)
-                
-                # Store result in cache
-                self.set(key, result, ttl)
-                
+
+                # Another caller holds the claim and will fill the key;
+                # don't stampede the store with duplicate writes
+                if raw != _PENDING:
+                    self.set(key, result, ttl)
+
                 return result
             return wrapper
         return decorator
         
+    def cache_batch(self, prefix: str, ttl: Optional[int] = None):
+        """Decorator for caching an item-list function element-wise
+
+        The wrapped function must take a list of items and return one
+        result per item in order. Cached items are resolved with a
+        single MGET and never reach the function; fresh results are
+        written back with one pipelined MSET.
+        """
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(items):
+                keys = [self.generate_key(prefix, item) for item in items]
+                results = self.mget(keys)
+
+                missing = [item for item, hit in zip(items, results) if hit is None]
+                if missing:
+                    fresh = iter(func(missing))
+                    to_store = {}
+                    for i, hit in enumerate(results):
+                        if hit is None:
+                            value = next(fresh)
+                            results[i] = value
+                            to_store[keys[i]] = value
+                    self.mset(to_store, ttl)
+
+                return results
+            return wrapper
+        return decorator
+
     def warm_cache(self, key: str, func: Callable, *args, **kwargs) -> Any:
         """Pre-populate cache with function result"""
         result = func(*args, **kwargs)